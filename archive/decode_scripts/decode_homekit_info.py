@@ -10,7 +10,11 @@ Extracts:
 - Model/manufacturer information
 """
 
+import argparse
+import json
+import logging
 import sys
+from collections import Counter
 from pathlib import Path
 from typing import Dict, Any, Optional
 
@@ -24,12 +28,28 @@ try:
     from weave.trait.description import description_pb2
     from weave.trait.power import power_pb2
     from nest.trait.structure import structure_pb2
+    from nest.rpc import rpc_pb2
+    _STREAM_BODY_CLS = rpc_pb2.StreamBody
     PROTO_AVAILABLE = True
 except ImportError as e:
     PROTO_AVAILABLE = False
     print(f"Warning: Proto definitions not available: {e}", file=sys.stderr)
     print("Some features will be limited.", file=sys.stderr)
 
+_LOGGER = logging.getLogger(__name__)
+
+# Per (context, exception type) failure counts for _log_decode_error
+_ERROR_COUNTS = Counter()
+
+
+def _log_decode_error(context: str, err: Exception) -> None:
+    """Log a decode failure with traceback, backing off to powers of two per error type."""
+    key = (context, type(err).__name__)
+    _ERROR_COUNTS[key] += 1
+    count = _ERROR_COUNTS[key]
+    if count & (count - 1) == 0:
+        _LOGGER.error("Error decoding %s (seen %d times): %s", context, count, err, exc_info=err)
+
 
 def decode_device_identity_trait(trait_data: bytes) -> Dict[str, Any]:
     """Decode DeviceIdentityTrait to extract serial, firmware, model."""
@@ -60,7 +80,7 @@ def decode_device_identity_trait(trait_data: bytes) -> Dict[str, Any]:
         
         return result
     except Exception as e:
-        print(f"Error decoding DeviceIdentityTrait: {e}", file=sys.stderr)
+        _log_decode_error("DeviceIdentityTrait", e)
         return {}
 
 
@@ -128,7 +148,7 @@ def decode_battery_power_source_trait(trait_data: bytes) -> Dict[str, Any]:
         
         return result
     except Exception as e:
-        print(f"Error decoding BatteryPowerSourceTrait: {e}", file=sys.stderr)
+        _log_decode_error("BatteryPowerSourceTrait", e)
         return {}
 
 
@@ -179,19 +199,54 @@ def decode_power_source_trait(trait_data: bytes) -> Dict[str, Any]:
         
         return result
     except Exception as e:
-        print(f"Error decoding PowerSourceTrait: {e}", file=sys.stderr)
+        _log_decode_error("PowerSourceTrait", e)
         return {}
 
 
+def _merge_device_identity(homekit_info: Dict[str, Any], trait_data: bytes) -> None:
+    identity = decode_device_identity_trait(trait_data)
+    if identity.get("serial_number"):
+        homekit_info["serial_number"] = identity["serial_number"]
+    if identity.get("firmware_version"):
+        homekit_info["firmware_version"] = identity["firmware_version"]
+    if identity.get("manufacturer") or identity.get("model"):
+        homekit_info["model_info"] = {
+            "manufacturer": identity.get("manufacturer"),
+            "model": identity.get("model"),
+        }
+
+
+def _merge_battery_power_source(homekit_info: Dict[str, Any], trait_data: bytes) -> None:
+    battery = decode_battery_power_source_trait(trait_data)
+    if battery:
+        homekit_info["battery_info"] = battery
+
+
+def _merge_power_source(homekit_info: Dict[str, Any], trait_data: bytes) -> None:
+    power = decode_power_source_trait(trait_data)
+    if power:
+        homekit_info["battery_info"].update(power)
+
+
+# Interned trait names so dispatch lookups can hit the identity fast path
+DEVICE_IDENTITY_TRAIT = sys.intern("weave.trait.description.DeviceIdentityTrait")
+BATTERY_POWER_SOURCE_TRAIT = sys.intern("weave.trait.power.BatteryPowerSourceTrait")
+POWER_SOURCE_TRAIT = sys.intern("weave.trait.power.PowerSourceTrait")
+
+_TRAIT_HANDLERS = {
+    DEVICE_IDENTITY_TRAIT: _merge_device_identity,
+    BATTERY_POWER_SOURCE_TRAIT: _merge_battery_power_source,
+    POWER_SOURCE_TRAIT: _merge_power_source,
+}
+
+
 def extract_homekit_info_from_stream_body(stream_body_data: bytes) -> Dict[str, Any]:
     """Extract HomeKit information from a StreamBody message."""
     if not PROTO_AVAILABLE:
         return {}
     
     try:
-        from nest.rpc import rpc_pb2
-        
-        stream_body = rpc_pb2.StreamBody()
+        stream_body = _STREAM_BODY_CLS()
         stream_body.ParseFromString(stream_body_data)
         
         homekit_info = {
@@ -210,46 +265,18 @@ def extract_homekit_info_from_stream_body(stream_body_data: bytes) -> Dict[str,
             
             # Process traits
             for trait in resource.traits:
-                trait_name = trait.name
-                trait_data = trait.data
-                
-                # DeviceIdentityTrait
-                if trait_name == "weave.trait.description.DeviceIdentityTrait":
-                    identity = decode_device_identity_trait(trait_data)
-                    if identity.get("serial_number"):
-                        homekit_info["serial_number"] = identity["serial_number"]
-                    if identity.get("firmware_version"):
-                        homekit_info["firmware_version"] = identity["firmware_version"]
-                    if identity.get("manufacturer") or identity.get("model"):
-                        homekit_info["model_info"] = {
-                            "manufacturer": identity.get("manufacturer"),
-                            "model": identity.get("model"),
-                        }
-                
-                # BatteryPowerSourceTrait
-                elif trait_name == "weave.trait.power.BatteryPowerSourceTrait":
-                    battery = decode_battery_power_source_trait(trait_data)
-                    if battery:
-                        homekit_info["battery_info"] = battery
-                
-                # PowerSourceTrait
-                elif trait_name == "weave.trait.power.PowerSourceTrait":
-                    power = decode_power_source_trait(trait_data)
-                    if power:
-                        homekit_info["battery_info"].update(power)
+                handler = _TRAIT_HANDLERS.get(trait.name)
+                if handler is not None:
+                    handler(homekit_info, trait.data)
         
         return homekit_info
     
     except Exception as e:
-        print(f"Error extracting HomeKit info: {e}", file=sys.stderr)
-        import traceback
-        traceback.print_exc()
+        _log_decode_error("StreamBody", e)
         return {}
 
 
 def main():
-    import argparse
-    
     parser = argparse.ArgumentParser(
         description="Decode HomeKit information from protobuf messages"
     )
@@ -324,7 +351,6 @@ def main():
     
     # Save to JSON if requested
     if args.output:
-        import json
         args.output.write_text(json.dumps(all_results, indent=2, default=str))
         print(f"✅ Results saved to: {args.output}")
     
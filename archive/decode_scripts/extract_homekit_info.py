@@ -13,189 +13,343 @@ Searches for:
 """
 
 import json
+import os
+import re
 import sys
 from pathlib import Path
-from typing import Dict, List, Any, Set
+from typing import Dict, List, Any, Set, Optional, Tuple
 from collections import defaultdict
 
+# Shared helpers live at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
-def extract_homekit_fields(blackbox_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Extract all HomeKit-relevant fields from decoded data."""
-    homekit_info = {
-        "serial_numbers": [],
-        "battery_info": [],
-        "firmware_versions": [],
-        "software_versions": [],
-        "last_contact": [],
-        "device_capabilities": [],
-        "model_info": [],
-        "manufacturer": [],
-        "other_fields": [],
-    }
+import json_utils
+from capture_index import file_stamp, load_index, map_files, save_index
+
+# Per capture directory cache of extracted results, keyed by file mtime + size
+_INDEX_NAME = ".homekit_index.json"
+_INDEX_VERSION = 1
+
+# Keywords to search for, in match order
+_KEYWORD_CATEGORIES = (
+    ("serial", "serial_numbers"),
+    ("battery", "battery_info"),
+    ("firmware", "firmware_versions"),
+    ("software", "software_versions"),
+    ("version", "software_versions"),
+    ("contact", "last_contact"),
+    ("timestamp", "last_contact"),
+    ("time", "last_contact"),
+    ("last", "last_contact"),
+    ("model", "model_info"),
+    ("manufacturer", "manufacturer"),
+    ("capability", "device_capabilities"),
+    ("state", "other_fields"),
+    ("status", "other_fields"),
+    ("level", "other_fields"),
+    ("charge", "battery_info"),
+    ("power", "battery_info"),
+)
+
+# One scan for "does any keyword occur"; most keys are field numbers and miss
+_KEYWORD_RE = re.compile("|".join(re.escape(keyword) for keyword, _ in _KEYWORD_CATEGORIES))
+
+# Lowercased key -> matching _KEYWORD_CATEGORIES indices; keys repeat heavily
+_KEY_MATCH_CACHE: Dict[str, Tuple[int, ...]] = {}
+_KEY_MATCH_CACHE_MAX = 8192
+
+
+def _keyword_matches(text: str) -> Tuple[int, ...]:
+    """Indices into _KEYWORD_CATEGORIES whose keyword occurs in text."""
+    if _KEYWORD_RE.search(text) is None:
+        return ()
+    return tuple(idx for idx, (keyword, _) in enumerate(_KEYWORD_CATEGORIES) if keyword in text)
+
+
+def _key_matches(key_str: str) -> Tuple[int, ...]:
+    matches = _KEY_MATCH_CACHE.get(key_str)
+    if matches is None:
+        matches = _keyword_matches(key_str)
+        if len(_KEY_MATCH_CACHE) < _KEY_MATCH_CACHE_MAX:
+            _KEY_MATCH_CACHE[key_str] = matches
+    return matches
+
+
+class _Field:
+    """Matched field record; turned into a plain dict only for the final results."""
     
-    # Keywords to search for
-    keyword_map = {
-        "serial": "serial_numbers",
-        "battery": "battery_info",
-        "firmware": "firmware_versions",
-        "software": "software_versions",
-        "version": "software_versions",
-        "contact": "last_contact",
-        "timestamp": "last_contact",
-        "time": "last_contact",
-        "last": "last_contact",
-        "model": "model_info",
-        "manufacturer": "manufacturer",
-        "capability": "device_capabilities",
-        "state": "other_fields",
-        "status": "other_fields",
-        "level": "other_fields",
-        "charge": "battery_info",
-        "power": "battery_info",
-    }
+    __slots__ = ("path", "key", "value", "full_path")
     
-    def search_fields(obj: Any, path: str = "", depth: int = 0):
-        if depth > 20:
-            return
-        
-        if isinstance(obj, dict):
-            for key, value in obj.items():
-                key_str = str(key).lower()
-                value_str = str(value).lower() if isinstance(value, (str, int, float)) else ""
+    def __init__(self, path: str, key: Any, value: Any, full_path: str):
+        self.path = path
+        self.key = key
+        self.value = value
+        self.full_path = full_path
+    
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "key": self.key,
+            "value": self.value,
+            "full_path": self.full_path,
+        }
+
+
+class _HomekitWalker:
+    """Collects HomeKit field records from one decoded capture."""
+    
+    def __init__(self):
+        self.homekit_info = {
+            "serial_numbers": [],
+            "battery_info": [],
+            "firmware_versions": [],
+            "software_versions": [],
+            "last_contact": [],
+            "device_capabilities": [],
+            "model_info": [],
+            "manufacturer": [],
+            "other_fields": [],
+        }
+        # full_paths already recorded per category, so duplicates are never stored
+        self.seen_paths = {category: set() for category in self.homekit_info}
+    
+    def _add(self, category: str, field: _Field) -> None:
+        if category not in self.homekit_info:
+            category = "other_fields"
+        seen = self.seen_paths[category]
+        if field.full_path not in seen:
+            seen.add(field.full_path)
+            self.homekit_info[category].append(field)
+    
+    def walk(self, blackbox_data: Any) -> Dict[str, List[_Field]]:
+        add = self._add
+        # Explicit DFS stack instead of recursion. Items are (is_entry, key, obj, path, depth):
+        # entries are dict items checked at their parent's path, the rest are nodes to expand.
+        # Entries are pushed in reverse so records come out in the same pre-order as before.
+        stack = [(False, None, blackbox_data, "", 0)]
+        while stack:
+            is_entry, key, value, path, depth = stack.pop()
+            
+            if is_entry:
+                # Lowercase the key and build its path once per entry
+                key_str = key.lower() if isinstance(key, str) else str(key).lower()
+                full_path = f"{path}.{key}" if path else str(key)
                 
-                # Check for keywords
-                for keyword, category in keyword_map.items():
-                    if keyword in key_str or (isinstance(value, str) and keyword in value_str):
-                        field_info = {
-                            "path": path,
-                            "key": key,
-                            "value": value,
-                            "full_path": f"{path}.{key}" if path else str(key),
-                        }
-                        
-                        # Categorize
-                        if category in homekit_info:
-                            homekit_info[category].append(field_info)
-                        else:
-                            homekit_info["other_fields"].append(field_info)
+                # Check for keywords (key results are cached, values are not).
+                # Only string values can match, so nothing else gets str()/lower()'d.
+                matches = _key_matches(key_str)
+                if isinstance(value, str):
+                    value_matches = _keyword_matches(value.lower())
+                    if value_matches:
+                        matches = sorted(set(matches).union(value_matches))
+                if matches:
+                    field_info = _Field(path, key, value, full_path)
+                    for idx in matches:
+                        add(_KEYWORD_CATEGORIES[idx][1], field_info)
                 
                 # Also check for numeric values that might be timestamps
                 if isinstance(value, (int, str)) and key_str in ["timestamp", "time", "last", "contact"]:
                     try:
                         val = int(value) if isinstance(value, str) else value
                         if val > 1000000000:  # Likely a timestamp (Unix epoch)
-                            homekit_info["last_contact"].append({
-                                "path": path,
-                                "key": key,
-                                "value": val,
-                                "full_path": f"{path}.{key}" if path else str(key),
-                            })
+                            add("last_contact", _Field(path, key, val, full_path))
                     except:
                         pass
                 
-                # Recursively search
-                search_fields(value, f"{path}.{key}" if path else str(key), depth + 1)
+                # Descend into the value next
+                stack.append((False, None, value, full_path, depth + 1))
+                continue
+            
+            if depth > 20:
+                continue
+            
+            if isinstance(value, dict):
+                stack.extend((True, k, v, path, depth) for k, v in reversed(value.items()))
+            elif isinstance(value, list):
+                for idx in range(len(value) - 1, -1, -1):
+                    stack.append((False, None, value[idx], f"{path}[{idx}]" if path else f"[{idx}]", depth + 1))
         
-        elif isinstance(obj, list):
-            for idx, item in enumerate(obj):
-                search_fields(item, f"{path}[{idx}]" if path else f"[{idx}]", depth + 1)
-    
-    search_fields(blackbox_data)
-    return homekit_info
+        return self.homekit_info
 
 
-def extract_device_metadata(blackbox_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Extract device metadata from message structure."""
-    metadata = {
-        "device_id": None,
-        "device_type": None,
-        "serial_number": None,
-        "model": None,
-        "manufacturer": None,
-        "capabilities": [],
-        "interfaces": [],
-        "traits": [],
-    }
+class _MetadataWalker:
+    """Collects device metadata from one decoded capture; later matches win."""
     
-    def find_device_info(obj: Any, depth: int = 0):
-        if depth > 15:
-            return
-        
-        if isinstance(obj, dict):
-            # Look for device ID
-            if "1" in obj and isinstance(obj["1"], str):
-                device_id = obj["1"]
-                if device_id.startswith("DEVICE_"):
-                    metadata["device_id"] = device_id
-                    metadata["serial_number"] = device_id.replace("DEVICE_", "")
-                
-                # Get resource type
-                if "2" in obj:
-                    resource_type = obj["2"]
-                    metadata["device_type"] = resource_type
-                    
-                    # Extract model/manufacturer from resource type
-                    if "yale" in resource_type.lower():
-                        metadata["manufacturer"] = "Yale"
-                    if "linus" in resource_type.lower():
-                        metadata["model"] = "Linus Lock"
-                
-                # Get traits
-                if "4" in obj:
-                    trait_list = obj["4"] if isinstance(obj["4"], list) else [obj["4"]]
-                    for trait in trait_list:
-                        if isinstance(trait, dict) and "2" in trait:
-                            metadata["traits"].append(trait["2"])
+    def __init__(self):
+        self.metadata = {
+            "device_id": None,
+            "device_type": None,
+            "serial_number": None,
+            "model": None,
+            "manufacturer": None,
+            "capabilities": [],
+            "interfaces": [],
+            "traits": [],
+        }
+    
+    def _visit_dict(self, obj: Dict[str, Any]) -> None:
+        metadata = self.metadata
+        # Look for device ID
+        if "1" in obj and isinstance(obj["1"], str):
+            device_id = obj["1"]
+            if device_id.startswith("DEVICE_"):
+                metadata["device_id"] = device_id
+                metadata["serial_number"] = device_id.replace("DEVICE_", "")
+            
+            # Get resource type
+            if "2" in obj:
+                resource_type = obj["2"]
+                metadata["device_type"] = resource_type
                 
-                # Get interfaces
-                if "7" in obj:
-                    iface_list = obj["7"] if isinstance(obj["7"], list) else [obj["7"]]
-                    for iface in iface_list:
-                        if isinstance(iface, dict) and "2" in iface:
-                            metadata["interfaces"].append(iface["2"])
+                # Extract model/manufacturer from resource type
+                if "yale" in resource_type.lower():
+                    metadata["manufacturer"] = "Yale"
+                if "linus" in resource_type.lower():
+                    metadata["model"] = "Linus Lock"
             
-            # Recursively search
-            for value in obj.values():
-                find_device_info(value, depth + 1)
-        
-        elif isinstance(obj, list):
-            for item in obj:
-                find_device_info(item, depth + 1)
+            # Get traits
+            if "4" in obj:
+                trait_list = obj["4"] if isinstance(obj["4"], list) else [obj["4"]]
+                for trait in trait_list:
+                    if isinstance(trait, dict) and "2" in trait:
+                        metadata["traits"].append(trait["2"])
+            
+            # Get interfaces
+            if "7" in obj:
+                iface_list = obj["7"] if isinstance(obj["7"], list) else [obj["7"]]
+                for iface in iface_list:
+                    if isinstance(iface, dict) and "2" in iface:
+                        metadata["interfaces"].append(iface["2"])
     
-    find_device_info(blackbox_data)
-    return metadata
+    def walk(self, blackbox_data: Any) -> Dict[str, Any]:
+        visit_dict = self._visit_dict
+        # Explicit pre-order DFS stack of (obj, depth) instead of recursion
+        stack = [(blackbox_data, 0)]
+        while stack:
+            obj, depth = stack.pop()
+            if depth > 15:
+                continue
+            
+            if isinstance(obj, dict):
+                visit_dict(obj)
+                # Visit children in their original order
+                stack.extend((value, depth + 1) for value in reversed(obj.values()))
+            
+            elif isinstance(obj, list):
+                stack.extend((item, depth + 1) for item in reversed(obj))
+        
+        return self.metadata
+
+
+def extract_homekit_fields(blackbox_data: Dict[str, Any]) -> Dict[str, List[_Field]]:
+    """Extract all HomeKit-relevant fields from decoded data as _Field records."""
+    return _HomekitWalker().walk(blackbox_data)
+
+
+def extract_device_metadata(blackbox_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Extract device metadata from message structure."""
+    return _MetadataWalker().walk(blackbox_data)
+
+
+def _list_captures(capture_dir: Path) -> List[Path]:
+    """Sorted *.blackbox.json files directly in capture_dir (os.scandir reuses cached dirent types)."""
+    with os.scandir(capture_dir) as entries:
+        names = sorted(
+            entry.name for entry in entries
+            if entry.name.endswith(".blackbox.json") and entry.is_file()
+        )
+    return [capture_dir / name for name in names]
+
+
+def _process_file(blackbox_file: Path) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[str]]:
+    """Parse one capture; returns (homekit_info, metadata, error) for the merge step."""
+    try:
+        data = json_utils.load_file(blackbox_file)
+        return extract_homekit_fields(data), extract_device_metadata(data), None
+    except Exception as e:
+        return None, None, str(e)
 
 
 def analyze_captures(capture_dirs: List[Path]) -> Dict[str, Any]:
     """Analyze all captures for HomeKit-relevant information."""
     all_homekit_info = defaultdict(list)
+    all_seen_paths = defaultdict(set)
     all_metadata = []
     
+    # Reuse indexed results for files unchanged since the last run
+    blackbox_files = []
+    results = []
+    pending = []
+    indexes = []
     for capture_dir in capture_dirs:
-        for blackbox_file in sorted(capture_dir.glob("*.blackbox.json")):
-            try:
-                with open(blackbox_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                
-                # Extract HomeKit fields
-                homekit_info = extract_homekit_fields(data)
-                for category, fields in homekit_info.items():
-                    if fields:
-                        all_homekit_info[category].extend(fields)
-                
-                # Extract device metadata
-                metadata = extract_device_metadata(data)
-                if metadata["device_id"]:
-                    all_metadata.append({
-                        "file": blackbox_file.name,
-                        **metadata,
-                    })
-            
-            except Exception as e:
-                print(f"Warning: Could not process {blackbox_file}: {e}", file=sys.stderr)
+        index_path = capture_dir / _INDEX_NAME
+        cached_files = load_index(index_path, _INDEX_VERSION)
+        current_files = {}
+        indexes.append((index_path, cached_files, current_files))
+        for blackbox_file in _list_captures(capture_dir):
+            stamp = file_stamp(blackbox_file)
+            entry = cached_files.get(blackbox_file.name)
+            if entry is not None and entry.get("stamp") == stamp:
+                current_files[blackbox_file.name] = entry
+                results.append((
+                    {
+                        category: [_Field(*record) for record in records]
+                        for category, records in entry["homekit_info"].items()
+                    },
+                    entry["metadata"],
+                    None,
+                ))
+            else:
+                pending.append((len(results), blackbox_file, stamp, current_files))
+                results.append(None)
+            blackbox_files.append(blackbox_file)
+    
+    for (slot, blackbox_file, stamp, current_files), result in zip(
+        pending, map_files(_process_file, [item[1] for item in pending])
+    ):
+        results[slot] = result
+        homekit_info, metadata, error = result
+        if error is None:
+            current_files[blackbox_file.name] = {
+                "stamp": stamp,
+                "homekit_info": {
+                    category: [[field.path, field.key, field.value, field.full_path] for field in fields]
+                    for category, fields in homekit_info.items()
+                },
+                "metadata": metadata,
+            }
+    
+    for index_path, cached_files, current_files in indexes:
+        if current_files != cached_files:
+            save_index(index_path, _INDEX_VERSION, current_files)
+    
+    for blackbox_file, (homekit_info, metadata, error) in zip(blackbox_files, results):
+        if error is not None:
+            print(f"Warning: Could not process {blackbox_file}: {error}", file=sys.stderr)
+            continue
+        
+        # Merge HomeKit fields
+        for category, fields in homekit_info.items():
+            if fields:
+                # Keep the first record per full_path across all files
+                seen_paths = all_seen_paths[category]
+                for field in fields:
+                    if field.full_path not in seen_paths:
+                        seen_paths.add(field.full_path)
+                        all_homekit_info[category].append(field)
+        
+        # Merge device metadata
+        if metadata["device_id"]:
+            all_metadata.append({
+                "file": blackbox_file.name,
+                **metadata,
+            })
     
     return {
-        "homekit_fields": dict(all_homekit_info),
+        "homekit_fields": {
+            category: [field.as_dict() for field in fields]
+            for category, fields in all_homekit_info.items()
+        },
         "device_metadata": all_metadata,
     }
 
@@ -224,7 +378,8 @@ def main():
         print(f"Error: Captures directory does not exist: {args.captures_dir}")
         return 1
     
-    capture_dirs = [d for d in args.captures_dir.iterdir() if d.is_dir()]
+    with os.scandir(args.captures_dir) as entries:
+        capture_dirs = [Path(entry.path) for entry in entries if entry.is_dir()]
     
     if not capture_dirs:
         print(f"Error: No capture directories found in {args.captures_dir}")
@@ -268,13 +423,7 @@ def main():
     for category, fields in results["homekit_fields"].items():
         if fields:
             print(f"\n{category.upper().replace('_', ' ')}: {len(fields)} field(s)")
-            unique_fields = {}
-            for field in fields:
-                key = f"{field['full_path']}"
-                if key not in unique_fields:
-                    unique_fields[key] = field
-            
-            for field in list(unique_fields.values())[:10]:  # Show first 10
+            for field in fields[:10]:  # Show first 10
                 value_str = str(field["value"])
                 if len(value_str) > 80:
                     value_str = value_str[:80] + "..."
@@ -28,6 +28,10 @@ except ImportError:
 
 _LOGGER = logging.getLogger(__name__)
 
+# Traits this subclass decodes itself; everything else is left to the parent.
+_DECODED_TRAIT_SUFFIXES = ("DeviceIdentityTrait", "BatteryPowerSourceTrait")
+_LEGACY_TYPE_PREFIX = "type.nestlabs.com/"
+
 
 def _normalize_any_type(any_message: Any) -> Any:
     """Map legacy Nest type URLs onto googleapis prefix."""
@@ -47,29 +51,29 @@ class EnhancedProtobufHandler(NestProtobufHandler):
     
     async def _process_message(self, message):
         """Process message and extract all trait data."""
-        # Call parent to get lock data
+        # Call parent to get lock data; it leaves the parsed body on self.stream_body
         locks_data = await super()._process_message(message)
+        if not message:
+            # Parent bailed out before parsing, so self.stream_body is stale
+            return locks_data
         
-        # Also extract all trait data
-        all_traits = {}
+        # Also extract all trait data (keep what the parent already decoded)
+        all_traits = dict(locks_data.get("all_traits") or {})
         
         try:
             stream_body = self.stream_body
             
             for msg in stream_body.message:
                 for get_op in msg.get:
-                    obj_id = get_op.object.id if get_op.object.id else None
-                    obj_key = get_op.object.key if get_op.object.key else "unknown"
-                    
-                    property_any = getattr(get_op.data, "property", None)
-                    property_any = _normalize_any_type(property_any) if property_any else None
-                    type_url = getattr(property_any, "type_url", None) if property_any else None
-                    
-                    if not type_url and 7 in get_op:
-                        type_url = "weave.trait.security.BoltLockTrait"
-                    
-                    if not type_url or not property_any:
+                    property_any = get_op.data.property
+                    raw_url = property_any.type_url
+                    # Cheap suffix test before any Any allocation or Unpack
+                    if not raw_url.endswith(_DECODED_TRAIT_SUFFIXES):
                         continue
+                    if raw_url.startswith(_LEGACY_TYPE_PREFIX):
+                        property_any = _normalize_any_type(property_any)
+                    type_url = property_any.type_url
+                    obj_id = get_op.object.id if get_op.object.id else None
                     
                     trait_key = f"{obj_id}:{type_url}"
                     trait_data = {"object_id": obj_id, "type_url": type_url, "decoded": False}
@@ -7,90 +7,208 @@ Usage:
     python find_serial_number.py --search-all
 """
 
-import json
+import mmap
+import os
+import re
 import sys
+from functools import partial
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Set
+
+# Shared helpers live at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import json_utils
+from capture_index import file_stamp, load_index, map_files, save_index
+
+try:
+    import ijson
+    IJSON_AVAILABLE = True
+except ImportError:
+    IJSON_AVAILABLE = False
+
+# Cache of serials found per capture file, keyed by file mtime + size
+_INDEX_NAME = ".serial_index.json"
+_INDEX_VERSION = 1
+
+# Captures at least this large are scanned with ijson instead of loaded whole
+_STREAM_PARSE_MIN_BYTES = 64 * 1024 * 1024
+
+# 8+ characters of letters, digits, '-' or '_', with at least one letter or digit
+_SERIAL_RE = re.compile(r"(?=[-_]*[A-Za-z0-9])[A-Za-z0-9_-]{8,}")
+
+
+def _walk_captures(capture_dir: Path) -> List[Path]:
+    """All *.blackbox.json files under capture_dir, in the same top-down order as rglob."""
+    return [
+        Path(root, name)
+        for root, _dirs, files in os.walk(capture_dir)
+        for name in files
+        if name.endswith(".blackbox.json")
+    ]
+
+
+def _search_file(serial_number: str, blackbox_file: Path) -> Optional[List[Dict[str, Any]]]:
+    """Return the serial's locations in one capture, or None if it is absent."""
+    try:
+        with open(blackbox_file, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Scan the raw bytes first; most files never mention the serial
+                if mm.find(serial_number.encode("utf-8")) == -1:
+                    return None
+                data = json_utils.loads(mm[:])
+        
+        # Find exact locations
+        return find_serial_locations(data, serial_number) or None
+    except Exception:
+        return None
 
 
 def search_for_serial(serial_number: str, capture_dir: Path) -> List[Dict[str, Any]]:
     """Search for serial number in all captures."""
-    results = []
+    blackbox_files = _walk_captures(capture_dir)
+    matches = map_files(partial(_search_file, serial_number), blackbox_files)
+    return [
+        {
+            "file": str(blackbox_file.relative_to(capture_dir)),
+            "locations": locations,
+        }
+        for blackbox_file, locations in zip(blackbox_files, matches)
+        if locations
+    ]
+
+
+class _SerialLocator:
+    """Finds every string value containing one serial number."""
     
-    for blackbox_file in capture_dir.rglob("*.blackbox.json"):
-        try:
-            with open(blackbox_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
+    def __init__(self, serial_number: str):
+        self.serial_number = serial_number
+        self.locations: List[Dict[str, Any]] = []
+    
+    def walk(self, obj: Any, path: str = "", depth: int = 0) -> List[Dict[str, Any]]:
+        serial_number = self.serial_number
+        locations = self.locations
+        # Explicit DFS stack of (is_entry, key, obj, path, depth); dict entries are pushed
+        # in reverse so locations keep the same pre-order the recursive version produced.
+        stack = [(False, None, obj, path, depth)]
+        while stack:
+            is_entry, key, value, path, depth = stack.pop()
             
-            # Search for serial number
-            data_str = json.dumps(data)
-            if serial_number in data_str:
-                # Find exact locations
-                locations = find_serial_locations(data, serial_number)
-                if locations:
-                    results.append({
-                        "file": str(blackbox_file.relative_to(capture_dir)),
-                        "locations": locations,
+            if is_entry:
+                if isinstance(value, str) and serial_number in value:
+                    locations.append({
+                        "path": f"{path}.{key}" if path else str(key),
+                        "key": key,
+                        "value": value,
+                        "field_number": key if isinstance(key, (int, str)) and str(key).isdigit() else None,
                     })
-        except Exception as e:
-            pass
-    
-    return results
+                elif isinstance(value, (dict, list)):
+                    stack.append((False, None, value, f"{path}.{key}" if path else str(key), depth + 1))
+                continue
+            
+            if depth > 20:
+                continue
+            
+            if isinstance(value, dict):
+                stack.extend((True, k, v, path, depth) for k, v in reversed(value.items()))
+            elif isinstance(value, list):
+                for idx in range(len(value) - 1, -1, -1):
+                    stack.append((False, None, value[idx], f"{path}[{idx}]" if path else f"[{idx}]", depth + 1))
+        
+        return locations
 
 
 def find_serial_locations(obj: Any, serial_number: str, path: str = "", depth: int = 0) -> List[Dict[str, Any]]:
     """Find all locations where serial number appears."""
-    if depth > 20:
-        return []
-    
-    locations = []
-    
-    if isinstance(obj, dict):
-        for key, value in obj.items():
-            if isinstance(value, str) and serial_number in value:
-                locations.append({
-                    "path": f"{path}.{key}" if path else str(key),
-                    "key": key,
-                    "value": value,
-                    "field_number": key if isinstance(key, (int, str)) and str(key).isdigit() else None,
-                })
-            elif isinstance(value, (dict, list)):
-                locations.extend(find_serial_locations(value, serial_number, f"{path}.{key}" if path else str(key), depth + 1))
-    elif isinstance(obj, list):
-        for idx, item in enumerate(obj):
-            locations.extend(find_serial_locations(item, serial_number, f"{path}[{idx}]" if path else f"[{idx}]", depth + 1))
-    
-    return locations
+    return _SerialLocator(serial_number).walk(obj, path, depth)
 
 
-def extract_all_serial_numbers(capture_dir: Path) -> List[str]:
-    """Extract all potential serial numbers from captures."""
-    serials = set()
-    
-    def find_serials(obj, depth=0):
+def _looks_like_serial(val: str) -> bool:
+    """Look for alphanumeric strings that could be serial numbers."""
+    return _SERIAL_RE.fullmatch(val) is not None
+
+
+def _find_serials(obj: Any, serials: Set[str]) -> None:
+    stack = [(obj, 0)]
+    while stack:
+        obj, depth = stack.pop()
         if depth > 15:
-            return
+            continue
         if isinstance(obj, dict):
             # Field 6 in DeviceIdentityTrait is serial_number
             if "6" in obj and isinstance(obj["6"], str):
                 val = obj["6"]
-                # Look for alphanumeric strings that could be serial numbers
-                if len(val) >= 8 and val.replace("-", "").replace("_", "").isalnum():
+                if _looks_like_serial(val):
                     serials.add(val)
-            for value in obj.values():
-                find_serials(value, depth + 1)
+            stack.extend((value, depth + 1) for value in obj.values())
         elif isinstance(obj, list):
-            for item in obj:
-                find_serials(item, depth + 1)
+            stack.extend((item, depth + 1) for item in obj)
+
+
+def _stream_serials(blackbox_file: Path, serials: Set[str]) -> None:
+    """Event-driven equivalent of _find_serials that never builds the whole tree."""
+    with open(blackbox_file, "rb") as f:
+        # Open containers; the innermost sits at depth - 1 in _find_serials terms.
+        # Tracked from the events rather than the prefix, as keys may contain dots.
+        depth = 0
+        key = None
+        for event, value in ijson.basic_parse(f):
+            if event == "map_key":
+                key = value
+                continue
+            if event in ("start_map", "start_array"):
+                depth += 1
+            elif event in ("end_map", "end_array"):
+                depth -= 1
+            elif event == "string" and key == "6" and depth <= 16 and _looks_like_serial(value):
+                serials.add(value)
+            key = None
+
+
+def _file_serials(blackbox_file: Path) -> Optional[Set[str]]:
+    """Collect candidate serial numbers from one capture, or None if it could not be read."""
+    serials = set()
+    try:
+        if IJSON_AVAILABLE and os.path.getsize(blackbox_file) >= _STREAM_PARSE_MIN_BYTES:
+            _stream_serials(blackbox_file, serials)
+        else:
+            _find_serials(json_utils.load_file(blackbox_file), serials)
+    except Exception:
+        return None
+    return serials
+
+
+def extract_all_serial_numbers(capture_dir: Path) -> List[str]:
+    """Extract all potential serial numbers from captures."""
+    index_path = capture_dir / _INDEX_NAME
+    cached_files = load_index(index_path, _INDEX_VERSION)
+    current_files = {}
+    serials = set()
+    
+    # Reuse indexed serials for files unchanged since the last run
+    pending = []
+    for blackbox_file in _walk_captures(capture_dir):
+        rel_path = str(blackbox_file.relative_to(capture_dir))
+        stamp = file_stamp(blackbox_file)
+        entry = cached_files.get(rel_path)
+        if entry is not None and entry.get("stamp") == stamp:
+            current_files[rel_path] = entry
+            serials.update(entry["serials"])
+        else:
+            pending.append((rel_path, stamp, blackbox_file))
     
-    for blackbox_file in capture_dir.rglob("*.blackbox.json"):
-        try:
-            with open(blackbox_file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-            find_serials(data)
-        except Exception:
-            pass
+    for (rel_path, stamp, _), file_serials in zip(
+        pending, map_files(_file_serials, [item[2] for item in pending])
+    ):
+        if file_serials is None:
+            continue  # Not indexed, so the next run retries it
+        current_files[rel_path] = {"stamp": stamp, "serials": sorted(file_serials)}
+        serials |= file_serials
     
+    if current_files != cached_files:
+        save_index(index_path, _INDEX_VERSION, current_files)
     return sorted(serials)
 
 
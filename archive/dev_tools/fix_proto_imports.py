@@ -3,33 +3,32 @@
 Fix import paths in proto files to use relative imports.
 """
 
-import re
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 HA_PROTO_DIR = Path("../ha-nest-yale-integration/custom_components/nest_yale_lock/proto")
 
-# Import path mappings: (old_pattern, new_pattern)
+# Import path mappings: (old_prefix, new_prefix); plain literals, so no regex needed
 IMPORT_FIXES = [
-    (r'import "proto/', r'import "'),
-    (r'import "google/protobuf/', r'import "zzzgoogle/protobuf/'),
+    (b'import "proto/', b'import "'),
+    (b'import "google/protobuf/', b'import "zzzgoogle/protobuf/'),
 ]
 
 
 def fix_proto_imports(proto_file: Path):
     """Fix import paths in a proto file."""
     try:
-        with open(proto_file, 'r') as f:
-            content = f.read()
-        
-        original = content
+        # Work on raw bytes; the fixes are ASCII so no decode/encode is needed
+        original = proto_file.read_bytes()
         
         # Apply fixes
-        for old_pattern, new_pattern in IMPORT_FIXES:
-            content = re.sub(old_pattern, new_pattern, content)
+        content = original
+        for old_prefix, new_prefix in IMPORT_FIXES:
+            content = content.replace(old_prefix, new_prefix)
         
         if content != original:
-            with open(proto_file, 'w') as f:
-                f.write(content)
+            proto_file.write_bytes(content)
             return True
         return False
     except Exception as e:
@@ -47,9 +46,15 @@ def main():
     
     print(f"Fixing imports in {len(proto_files)} proto file(s)...")
     
+    # Each file is an independent read/replace/write, so overlap the I/O
+    proto_files.sort()
+    workers = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(fix_proto_imports, proto_files))
+    
     fixed = 0
-    for proto_file in sorted(proto_files):
-        if fix_proto_imports(proto_file):
+    for proto_file, was_fixed in zip(proto_files, results):
+        if was_fixed:
             print(f"✅ Fixed: {proto_file.relative_to(HA_PROTO_DIR)}")
             fixed += 1
     
@@ -1,6 +1,7 @@
 import asyncio
 import logging
 import os
+from functools import lru_cache
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -19,4 +20,9 @@ async def read_protobuf_file(file_path):
 def _read_protobuf(file_path):
     """Actual file reading function (runs in a separate thread)."""
     with open(file_path, "rb") as f:
-        return f.read()
\ No newline at end of file
+        return f.read()
+
+@lru_cache(maxsize=8)
+def load_protobuf_cached(file_path):
+    """Read a constant protobuf payload once; later calls return the cached bytes."""
+    return _read_protobuf(file_path)
@@ -1,6 +1,8 @@
 from dotenv import load_dotenv
 import os
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from const import (
   API_TIMEOUT_SECONDS,
   USER_AGENT_STRING,
@@ -22,10 +24,12 @@ def GetSessionWithAuth():
     'User-Agent': USER_AGENT_STRING,
     'timeout': f"{API_TIMEOUT_SECONDS}",
   }
-  response = requests.request("GET", ISSUE_TOKEN, headers=headers)
+  # Route every auth hop through one Session so connections are pooled
+  session = requests.Session()
+  session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=Retry(total=2, backoff_factor=0.2)))
+  response = session.request("GET", ISSUE_TOKEN, headers=headers)
   google_access_token = response.json().get("access_token")
   # Note: Removed debug print that could expose tokens
-  session = requests.Session()
 
   # Exchange Google Access Token for Nest JWT
   nest_url = "https://nestauthproxyservice-pa.googleapis.com/v1/issue_jwt"
@@ -0,0 +1,49 @@
+"""Helpers shared by the capture analysis scripts that scan *.blackbox.json files."""
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List
+
+import json_utils
+
+# Below this many files a process pool costs more than it saves
+PARALLEL_MIN_FILES = 8
+
+
+def file_stamp(path: Path) -> List[int]:
+    """mtime + size of a capture file; an index entry is reused while this matches."""
+    st = path.stat()
+    return [st.st_mtime_ns, st.st_size]
+
+
+def load_index(index_path: Path, version: int) -> Dict[str, Any]:
+    """Cached per-file results from a previous run, or {} if missing/stale."""
+    try:
+        index = json_utils.load_file(index_path)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(index, dict) or index.get("version") != version:
+        return {}
+    return index.get("files") or {}
+
+
+def save_index(index_path: Path, version: int, files: Dict[str, Any]) -> None:
+    """Write the per-file results atomically; a failed write only costs the cache."""
+    tmp_path = index_path.with_name(index_path.name + ".tmp")
+    try:
+        tmp_path.write_bytes(json_utils.dumps_bytes({"version": version, "files": files}))
+        os.replace(tmp_path, index_path)
+    except OSError as e:
+        print(f"Warning: Could not write index {index_path}: {e}", file=sys.stderr)
+
+
+def map_files(func, files: List[Path]) -> List[Any]:
+    """Apply func to each file, fanning out to worker processes for larger batches."""
+    if len(files) < PARALLEL_MIN_FILES:
+        return [func(path) for path in files]
+    workers = os.cpu_count() or 1
+    chunksize = max(1, len(files) // (4 * workers))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, files, chunksize=chunksize))
@@ -5,10 +5,15 @@ import asyncio
 import json
 import sys
 import logging
+from collections import defaultdict
+from functools import lru_cache
+from itertools import groupby
 from dotenv import load_dotenv
 import os
 import requests
+from requests.utils import DEFAULT_ACCEPT_ENCODING
 from proto.nestlabs.gateway import v2_pb2
+from protobuf_handler import _frame_iter
 from protobuf_handler_enhanced import EnhancedProtobufHandler
 
 # Suppress DecodeError logging - we'll handle it ourselves
@@ -98,7 +103,8 @@ for trait_name in trait_names:
 payload_observe = req.SerializeToString()
 
 headers_observe = {
-    'Accept-Encoding': 'gzip, deflate, br, zstd',
+    # Only advertise encodings urllib3 can decode here (br/zstd need their libraries installed)
+    'Accept-Encoding': DEFAULT_ACCEPT_ENCODING,
     'Content-Type': 'application/x-protobuf',
     'User-Agent': USER_AGENT_STRING,
     'X-Accept-Response-Streaming': 'true',
@@ -109,6 +115,11 @@ headers_observe = {
     'Authorization': 'Basic ' + access_token
 }
 
+@lru_cache(maxsize=256)
+def _short_name(type_url):
+    """Trait name from a type URL (type URLs repeat across messages)."""
+    return type_url.rpartition('.')[2]
+
 def _normalize_base(url):
     return url.rstrip("/") if url else None
 
@@ -145,95 +156,92 @@ if observe_response is None:
 # Process with enhanced handler - use same approach as main.py
 handler = EnhancedProtobufHandler()
 message_count = 0
-all_decoded_data = {}
+# Summary values flattened to {(trait_name, key): set of str(value)}
+all_decoded_data = defaultdict(set)
 locks_data = {"yale": {}, "user_id": None, "structure_id": None, "all_traits": {}}
 
 print("Processing messages...\n", flush=True)
 
+# One event loop for the whole stream instead of asyncio.run() per chunk
+loop = asyncio.new_event_loop()
+# Parse only whole StreamBody fields, however the network splits them
 try:
-    for chunk in observe_response.iter_content(chunk_size=None):
-        if chunk:
-            async def process_chunk(current_data):
-                new_data = await handler._process_message(chunk)
-                current_data.update(new_data)
-                return current_data
-            locks_data = asyncio.run(process_chunk(locks_data))
+    for frame in _frame_iter(observe_response.iter_content(chunk_size=65536)):
+        locks_data.update(loop.run_until_complete(handler._process_message(frame)))
+        
+        # Check if we have any actual data
+        has_data = False
+        if locks_data.get("yale") and locks_data["yale"]:
+            has_data = True
+        if locks_data.get("user_id"):
+            has_data = True
+        if locks_data.get("structure_id"):
+            has_data = True
+        if locks_data.get("all_traits") and locks_data["all_traits"]:
+            has_data = True
+        
+        # Process decoded message if we have data (show first complete message)
+        if has_data:
+            message_count += 1
+            print(f"{'='*80}", flush=True)
+            print(f"MESSAGE {message_count}", flush=True)
+            print(f"{'='*80}", flush=True)
+            
+            if locks_data.get("yale"):
+                print("\n🔒 Lock Data:", flush=True)
+                for dev_id, info in locks_data["yale"].items():
+                    print(f"  Device: {dev_id}", flush=True)
+                    print(f"    Locked: {info.get('bolt_locked')}", flush=True)
+                    print(f"    Moving: {info.get('bolt_moving')}", flush=True)
             
-            # Check if we have any actual data
-            has_data = False
-            if locks_data.get("yale") and locks_data["yale"]:
-                has_data = True
             if locks_data.get("user_id"):
-                has_data = True
+                print(f"\n👤 User ID: {locks_data['user_id']}", flush=True)
+            
             if locks_data.get("structure_id"):
-                has_data = True
-            if locks_data.get("all_traits") and locks_data["all_traits"]:
-                has_data = True
+                print(f"\n🏠 Structure ID: {locks_data['structure_id']}", flush=True)
             
-            # Process decoded message if we have data (show first complete message)
-            if has_data:
-                message_count += 1
-                print(f"{'='*80}", flush=True)
-                print(f"MESSAGE {message_count}", flush=True)
-                print(f"{'='*80}", flush=True)
-                
-                if locks_data.get("yale"):
-                    print("\n🔒 Lock Data:", flush=True)
-                    for dev_id, info in locks_data["yale"].items():
-                        print(f"  Device: {dev_id}", flush=True)
-                        print(f"    Locked: {info.get('bolt_locked')}", flush=True)
-                        print(f"    Moving: {info.get('bolt_moving')}", flush=True)
-                
-                if locks_data.get("user_id"):
-                    print(f"\n👤 User ID: {locks_data['user_id']}", flush=True)
-                
-                if locks_data.get("structure_id"):
-                    print(f"\n🏠 Structure ID: {locks_data['structure_id']}", flush=True)
-                
-                all_traits = locks_data.get("all_traits", {})
-                if all_traits:
-                    print(f"\n📊 Decoded Traits ({len(all_traits)}):", flush=True)
-                    for trait_key, trait_info in sorted(all_traits.items()):
-                        type_url = trait_info.get("type_url", "unknown")
-                        object_id = trait_info.get("object_id", "unknown")
-                        decoded = trait_info.get("decoded", False)
-                        
-                        status = "✅" if decoded else "⚠️"
-                        trait_name = type_url.split('.')[-1] if type_url else "unknown"
-                        print(f"\n  {status} {trait_name}", flush=True)
-                        print(f"      Object: {object_id}", flush=True)
-                        
-                        if decoded:
-                            data = trait_info.get("data", {})
-                            if data:
-                                print(f"      Data:", flush=True)
-                                for key, value in data.items():
-                                    if value is not None:
-                                        # Format battery level as percentage
-                                        if key == "battery_level" and isinstance(value, float):
-                                            print(f"        {key}: {value * 100:.1f}%", flush=True)
-                                        else:
-                                            print(f"        {key}: {value}", flush=True)
-                                        # Store for summary
-                                        if trait_name not in all_decoded_data:
-                                            all_decoded_data[trait_name] = {}
-                                        if key not in all_decoded_data[trait_name]:
-                                            all_decoded_data[trait_name][key] = []
-                                        all_decoded_data[trait_name][key].append(value)
-                            else:
-                                print(f"      (no data)", flush=True)
+            all_traits = locks_data.get("all_traits", {})
+            if all_traits:
+                print(f"\n📊 Decoded Traits ({len(all_traits)}):", flush=True)
+                for trait_key, trait_info in sorted(all_traits.items()):
+                    type_url = trait_info.get("type_url", "unknown")
+                    object_id = trait_info.get("object_id", "unknown")
+                    decoded = trait_info.get("decoded", False)
+                    
+                    status = "✅" if decoded else "⚠️"
+                    trait_name = _short_name(type_url) if type_url else "unknown"
+                    print(f"\n  {status} {trait_name}", flush=True)
+                    print(f"      Object: {object_id}", flush=True)
+                    
+                    if decoded:
+                        data = trait_info.get("data", {})
+                        if data:
+                            print(f"      Data:", flush=True)
+                            for key, value in data.items():
+                                if value is not None:
+                                    # Format battery level as percentage
+                                    if key == "battery_level" and isinstance(value, float):
+                                        print(f"        {key}: {value * 100:.1f}%", flush=True)
+                                    else:
+                                        print(f"        {key}: {value}", flush=True)
+                                    # Store for summary
+                                    all_decoded_data[(trait_name, key)].add(str(value))
                         else:
-                            error = trait_info.get("error", "Not decoded")
-                            print(f"      Error: {error}", flush=True)
-                
-                print(flush=True)
-                observe_response.close()
-                break
+                            print(f"      (no data)", flush=True)
+                    else:
+                        error = trait_info.get("error", "Not decoded")
+                        print(f"      Error: {error}", flush=True)
+            
+            print(flush=True)
+            observe_response.close()
+            break
 except (requests.exceptions.ConnectionError, requests.exceptions.ReadTimeout, TimeoutError) as e:
     # Expected - stream timeout after getting data
     pass
 except KeyboardInterrupt:
     pass
+finally:
+    loop.close()
 
 session.close()
 
@@ -242,14 +250,14 @@ print("="*80, flush=True)
 print("FINAL SUMMARY", flush=True)
 print("="*80, flush=True)
 print(f"\nMessages processed: {message_count}", flush=True)
-print(f"Traits decoded: {len(all_decoded_data)}", flush=True)
+print(f"Traits decoded: {len({trait_name for trait_name, _ in all_decoded_data})}", flush=True)
 
 if all_decoded_data:
     print("\n📋 All Decoded Data:", flush=True)
-    for trait_name, data_dict in sorted(all_decoded_data.items()):
+    for trait_name, entries in groupby(sorted(all_decoded_data.items()), key=lambda item: item[0][0]):
         print(f"\n  {trait_name}:", flush=True)
-        for key, values in data_dict.items():
-            unique_values = list(set(str(v) for v in values if v is not None))
+        for (_, key), values in entries:
+            unique_values = list(values)
             if unique_values:
                 print(f"    {key}: {', '.join(unique_values[:5])}", flush=True)
                 if len(unique_values) > 5:
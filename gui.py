@@ -9,15 +9,33 @@ import argparse
 import asyncio
 import json
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional
 
+from requests.adapters import HTTPAdapter
+
 try:
-    from flask import Flask, render_template_string, jsonify, request
+    from flask import Flask, Response, jsonify, request
     FLASK_AVAILABLE = True
 except ImportError:
     FLASK_AVAILABLE = False
 
+try:
+    # Pluggable JSON providers need Flask 2.2+; older versions keep the default encoder
+    from flask.json.provider import DefaultJSONProvider
+    FLASK_JSON_PROVIDER_AVAILABLE = True
+except ImportError:
+    FLASK_JSON_PROVIDER_AVAILABLE = False
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 try:
     import tkinter as tk
     from tkinter import ttk, scrolledtext, messagebox
@@ -33,11 +51,73 @@ from nest_tool import (
     NestProtobufHandler,
     _build_observe_payload
 )
+from const import API_GOOGLE_REAUTH_MINUTES
+
+# Authenticated session shared by every GUI action, re-created shortly before the token expires
+_SESSION_LOCK = threading.Lock()
+_SESSION_CACHE = {"auth": None, "expiry": 0.0, "generation": 0}
+_SESSION_TTL_SECONDS = API_GOOGLE_REAUTH_MINUTES * 60 - 60
+
+
+def _drop_session(generation):
+    """Forget the cached session created as generation so the next action re-authenticates.
+
+    The session is not closed: actions already using it finish normally and it
+    is released once the last of them drops its reference.
+    """
+    with _SESSION_LOCK:
+        if _SESSION_CACHE["generation"] == generation:
+            _SESSION_CACHE["auth"] = None
+
+
+def _get_session():
+    """Return a cached (session, access_token, user_id, transport_url), re-authenticating when stale."""
+    with _SESSION_LOCK:
+        auth = _SESSION_CACHE["auth"]
+        if auth is not None and time.monotonic() < _SESSION_CACHE["expiry"]:
+            return auth
+        auth = GetSessionWithAuth()
+        session = auth[0]
+        # Size the keep-alive pool for concurrent Flask worker threads, keeping the auth retries
+        retries = session.get_adapter("https://").max_retries
+        session.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=50, max_retries=retries))
+        generation = _SESSION_CACHE["generation"] + 1
+
+        def _drop_on_auth_error(response, *args, **kwargs):
+            # A rejected or revoked token should not stay cached until the TTL runs out.
+            # Only the generation is captured, so the hook keeps no reference back to the session.
+            if response.status_code in (401, 403):
+                _drop_session(generation)
+
+        session.hooks["response"].append(_drop_on_auth_error)
+        _SESSION_CACHE["auth"] = auth
+        _SESSION_CACHE["expiry"] = time.monotonic() + _SESSION_TTL_SECONDS
+        _SESSION_CACHE["generation"] = generation
+        return auth
 
 
 # Web-based GUI (Flask)
+if FLASK_JSON_PROVIDER_AVAILABLE and ORJSON_AVAILABLE:
+    class _OrjsonProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by orjson, falling back to the stdlib for anything it rejects."""
+        
+        def dumps(self, obj, **kwargs):
+            try:
+                return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SORT_KEYS).decode()
+            except TypeError:
+                return super().dumps(obj, **kwargs)
+        
+        def loads(self, s, **kwargs):
+            try:
+                return orjson.loads(s)
+            except orjson.JSONDecodeError:
+                return super().loads(s, **kwargs)
+
+
 if FLASK_AVAILABLE:
     app = Flask(__name__)
+    if FLASK_JSON_PROVIDER_AVAILABLE and ORJSON_AVAILABLE:
+        app.json = _OrjsonProvider(app)
     
     HTML_TEMPLATE = """
     <!DOCTYPE html>
@@ -160,22 +240,22 @@ if FLASK_AVAILABLE:
                     return;
                 }
                 
-                let html = '<div class="lock-info">';
+                const parts = ['<div class="lock-info">'];
                 for (const [deviceId, lockInfo] of Object.entries(locks)) {
                     if (!currentDeviceId) currentDeviceId = deviceId;
                     const isLocked = lockInfo.bolt_locked ? '🔒 Locked' : '🔓 Unlocked';
                     const isMoving = lockInfo.bolt_moving ? ' (Moving)' : '';
-                    html += `
+                    parts.push(`
                         <div class="lock-card">
                             <h3>${deviceId}</h3>
                             <p><strong>Status:</strong> ${isLocked}${isMoving}</p>
                             <p><strong>Actuator State:</strong> ${lockInfo.actuator_state || 'N/A'}</p>
                             <button onclick="selectDevice('${deviceId}')">Select</button>
                         </div>
-                    `;
+                    `);
                 }
-                html += '</div>';
-                container.innerHTML = html;
+                parts.push('</div>');
+                container.innerHTML = parts.join('');
             }
             
             function selectDevice(deviceId) {
@@ -243,14 +323,16 @@ if FLASK_AVAILABLE:
                     return;
                 }
                 
-                let html = '<div class="trait-list">';
+                const parts = ['<div class="trait-list">'];
                 for (const [traitKey, traitInfo] of Object.entries(allTraits)) {
-                    const [objId, typeUrl] = traitKey.split(':', 2);
-                    const traitName = typeUrl.split('.').pop() || typeUrl;
+                    const sep = traitKey.indexOf(':');
+                    const objId = sep >= 0 ? traitKey.slice(0, sep) : null;
+                    const typeUrl = sep >= 0 ? traitKey.slice(sep + 1) : traitKey;
+                    const traitName = typeUrl.slice(typeUrl.lastIndexOf('.') + 1) || typeUrl;
                     const decoded = traitInfo.decoded;
                     const data = traitInfo.data || {};
                     
-                    html += `
+                    parts.push(`
                         <div class="trait-item ${decoded ? 'decoded' : 'not-decoded'}">
                             <strong>${traitName}</strong> ${decoded ? '✅' : '⚠️'}
                             <br><small>Object: ${objId || 'N/A'}</small>
@@ -258,10 +340,10 @@ if FLASK_AVAILABLE:
                                 '<pre>' + JSON.stringify(data, null, 2) + '</pre>' : 
                                 '<p>Not decoded</p>'}
                         </div>
-                    `;
+                    `);
                 }
-                html += '</div>';
-                container.innerHTML = html;
+                parts.push('</div>');
+                container.innerHTML = parts.join('');
             }
             
             function showStatus(message, type) {
@@ -279,15 +361,15 @@ if FLASK_AVAILABLE:
     
     @app.route('/')
     def index():
-        return render_template_string(HTML_TEMPLATE)
+        # The page has no template variables, so skip Jinja and serve it as-is
+        return Response(HTML_TEMPLATE, mimetype='text/html')
     
     @app.route('/api/locks')
     def api_locks():
         try:
-            session, access_token, user_id, transport_url = GetSessionWithAuth()
-            handler = NestProtobufHandler()
+            session, access_token, user_id, transport_url = _get_session()
+            handler = NestProtobufHandler(decode_all_traits=False)
             locks_data, _ = asyncio.run(_observe_stream(session, access_token, transport_url, handler))
-            session.close()
             return jsonify(locks_data)
         except Exception as e:
             return jsonify({'error': str(e)}), 500
@@ -295,10 +377,9 @@ if FLASK_AVAILABLE:
     @app.route('/api/decode')
     def api_decode():
         try:
-            session, access_token, user_id, transport_url = GetSessionWithAuth()
+            session, access_token, user_id, transport_url = _get_session()
             handler = EnhancedProtobufHandler()
             locks_data, _ = asyncio.run(_observe_stream(session, access_token, transport_url, handler, max_messages=5))
-            session.close()
             return jsonify(locks_data)
         except Exception as e:
             return jsonify({'error': str(e)}), 500
@@ -313,8 +394,8 @@ if FLASK_AVAILABLE:
             if not device_id or not action:
                 return jsonify({'success': False, 'error': 'Missing device_id or action'}), 400
             
-            session, access_token, user_id, transport_url = GetSessionWithAuth()
-            handler = NestProtobufHandler()
+            session, access_token, user_id, transport_url = _get_session()
+            handler = NestProtobufHandler(decode_all_traits=False)
             locks_data, observe_base = asyncio.run(_observe_stream(session, access_token, transport_url, handler))
             
             response = _send_lock_command(
@@ -323,7 +404,6 @@ if FLASK_AVAILABLE:
                 locks_data.get('structure_id'),
                 action, observe_base, transport_url, dry_run=False
             )
-            session.close()
             
             return jsonify({'success': True, 'response': str(response)})
         except Exception as e:
@@ -354,6 +434,8 @@ if TKINTER_AVAILABLE:
             
             self.current_device_id = None
             self.session_data = None
+            # Network work runs here so the Tk main loop never blocks; one thread keeps actions ordered
+            self._worker = ThreadPoolExecutor(max_workers=1)
         
         def setup_lock_tab(self, parent):
             # Status frame
@@ -392,35 +474,48 @@ if TKINTER_AVAILABLE:
             
             ttk.Button(button_frame, text="Decode All Traits", command=self.decode_traits).pack(side=tk.LEFT, padx=5)
         
+        def _in_background(self, work, on_done, on_error):
+            """Run work() on the worker thread and hand its outcome back to the Tk thread."""
+            def task():
+                try:
+                    result = work()
+                except Exception as e:
+                    self.root.after(0, on_error, e)
+                    return
+                self.root.after(0, on_done, result)
+            self._worker.submit(task)
+        
         def refresh_locks(self):
             self.status_label.config(text="Loading...")
-            self.root.update()
+            self._in_background(self._fetch_locks, self._render_locks, self._show_lock_error)
+        
+        def _fetch_locks(self):
+            session, access_token, user_id, transport_url = _get_session()
+            handler = NestProtobufHandler(decode_all_traits=False)
+            locks_data, _ = asyncio.run(_observe_stream(session, access_token, transport_url, handler))
+            return locks_data
+        
+        def _render_locks(self, locks_data):
+            self.session_data = locks_data
+            locks = locks_data.get('yale', {})
             
-            try:
-                session, access_token, user_id, transport_url = GetSessionWithAuth()
-                handler = NestProtobufHandler()
-                locks_data, _ = asyncio.run(_observe_stream(session, access_token, transport_url, handler))
-                session.close()
-                
-                self.session_data = locks_data
-                locks = locks_data.get('yale', {})
-                
-                self.locks_text.delete(1.0, tk.END)
-                if locks:
-                    for device_id, lock_info in locks.items():
-                        if not self.current_device_id:
-                            self.current_device_id = device_id
-                        status = "🔒 Locked" if lock_info.get('bolt_locked') else "🔓 Unlocked"
-                        moving = " (Moving)" if lock_info.get('bolt_moving') else ""
-                        self.locks_text.insert(tk.END, f"{device_id}: {status}{moving}\n")
-                        self.locks_text.insert(tk.END, f"  Actuator State: {lock_info.get('actuator_state', 'N/A')}\n\n")
-                else:
-                    self.locks_text.insert(tk.END, "No locks found\n")
-                
-                self.status_label.config(text="Status refreshed")
-            except Exception as e:
-                self.status_label.config(text=f"Error: {e}")
-                messagebox.showerror("Error", str(e))
+            self.locks_text.delete(1.0, tk.END)
+            if locks:
+                for device_id, lock_info in locks.items():
+                    if not self.current_device_id:
+                        self.current_device_id = device_id
+                    status = "🔒 Locked" if lock_info.get('bolt_locked') else "🔓 Unlocked"
+                    moving = " (Moving)" if lock_info.get('bolt_moving') else ""
+                    self.locks_text.insert(tk.END, f"{device_id}: {status}{moving}\n")
+                    self.locks_text.insert(tk.END, f"  Actuator State: {lock_info.get('actuator_state', 'N/A')}\n\n")
+            else:
+                self.locks_text.insert(tk.END, "No locks found\n")
+            
+            self.status_label.config(text="Status refreshed")
+        
+        def _show_lock_error(self, e):
+            self.status_label.config(text=f"Error: {e}")
+            messagebox.showerror("Error", str(e))
         
         def send_command(self, action):
             if not self.current_device_id:
@@ -428,62 +523,67 @@ if TKINTER_AVAILABLE:
                 return
             
             self.status_label.config(text=f"Sending {action} command...")
-            self.root.update()
+            device_id = self.current_device_id
+            self._in_background(
+                lambda: self._send_command_worker(device_id, action),
+                lambda _response: self._command_sent(action),
+                self._show_lock_error,
+            )
+        
+        def _send_command_worker(self, device_id, action):
+            session, access_token, user_id, transport_url = _get_session()
+            handler = NestProtobufHandler(decode_all_traits=False)
+            locks_data, observe_base = asyncio.run(_observe_stream(session, access_token, transport_url, handler))
             
-            try:
-                session, access_token, user_id, transport_url = GetSessionWithAuth()
-                handler = NestProtobufHandler()
-                locks_data, observe_base = asyncio.run(_observe_stream(session, access_token, transport_url, handler))
-                
-                response = _send_lock_command(
-                    session, access_token, self.current_device_id,
-                    locks_data.get('user_id') or user_id,
-                    locks_data.get('structure_id'),
-                    action, observe_base, transport_url, dry_run=False
-                )
-                session.close()
-                
-                self.status_label.config(text=f"{action.capitalize()} command sent")
-                messagebox.showinfo("Success", f"{action.capitalize()} command sent successfully")
-                self.refresh_locks()
-            except Exception as e:
-                self.status_label.config(text=f"Error: {e}")
-                messagebox.showerror("Error", str(e))
+            return _send_lock_command(
+                session, access_token, device_id,
+                locks_data.get('user_id') or user_id,
+                locks_data.get('structure_id'),
+                action, observe_base, transport_url, dry_run=False
+            )
+        
+        def _command_sent(self, action):
+            self.status_label.config(text=f"{action.capitalize()} command sent")
+            messagebox.showinfo("Success", f"{action.capitalize()} command sent successfully")
+            self.refresh_locks()
         
         def decode_traits(self):
             self.traits_text.delete(1.0, tk.END)
             self.traits_text.insert(tk.END, "Decoding traits...\n")
-            self.root.update()
+            self._in_background(self._fetch_traits, self._render_traits, self._show_decode_error)
+        
+        def _fetch_traits(self):
+            session, access_token, user_id, transport_url = _get_session()
+            handler = EnhancedProtobufHandler()
+            locks_data, _ = asyncio.run(_observe_stream(session, access_token, transport_url, handler, max_messages=5))
+            return locks_data
+        
+        def _render_traits(self, locks_data):
+            all_traits = locks_data.get('all_traits', {})
+            self.traits_text.delete(1.0, tk.END)
             
-            try:
-                session, access_token, user_id, transport_url = GetSessionWithAuth()
-                handler = EnhancedProtobufHandler()
-                locks_data, _ = asyncio.run(_observe_stream(session, access_token, transport_url, handler, max_messages=5))
-                session.close()
-                
-                all_traits = locks_data.get('all_traits', {})
-                self.traits_text.delete(1.0, tk.END)
-                
-                if all_traits:
-                    for trait_key, trait_info in sorted(all_traits.items()):
-                        obj_id, type_url = trait_key.split(':', 1) if ':' in trait_key else (None, trait_key)
-                        trait_name = type_url.split('.').pop() if '.' in type_url else type_url
-                        decoded = trait_info.get('decoded', False)
-                        data = trait_info.get('data', {})
-                        
-                        status = "✅" if decoded else "⚠️"
-                        self.traits_text.insert(tk.END, f"{status} {trait_name}\n")
-                        if obj_id:
-                            self.traits_text.insert(tk.END, f"  Object: {obj_id}\n")
-                        if decoded and data:
-                            self.traits_text.insert(tk.END, f"  Data: {json.dumps(data, indent=2)}\n")
-                        self.traits_text.insert(tk.END, "\n")
-                else:
-                    self.traits_text.insert(tk.END, "No traits found\n")
-            except Exception as e:
-                self.traits_text.insert(tk.END, f"Error: {e}\n")
-                messagebox.showerror("Error", str(e))
-
+            if all_traits:
+                for trait_key, trait_info in sorted(all_traits.items()):
+                    obj_id, sep, type_url = trait_key.partition(':')
+                    if not sep:
+                        obj_id, type_url = None, trait_key
+                    trait_name = type_url.rpartition('.')[2] or type_url
+                    decoded = trait_info.get('decoded', False)
+                    data = trait_info.get('data', {})
+                    
+                    status = "✅" if decoded else "⚠️"
+                    self.traits_text.insert(tk.END, f"{status} {trait_name}\n")
+                    if obj_id:
+                        self.traits_text.insert(tk.END, f"  Object: {obj_id}\n")
+                    if decoded and data:
+                        self.traits_text.insert(tk.END, f"  Data: {json.dumps(data, indent=2)}\n")
+                    self.traits_text.insert(tk.END, "\n")
+            else:
+                self.traits_text.insert(tk.END, "No traits found\n")
+        
+        def _show_decode_error(self, e):
+            self.traits_text.insert(tk.END, f"Error: {e}\n")
+            messagebox.showerror("Error", str(e))
 
 def main():
     parser = argparse.ArgumentParser(description="GUI interface for Nest Yale Lock")
@@ -0,0 +1,55 @@
+"""JSON helpers that use orjson when it is installed and the stdlib json module otherwise."""
+
+import json
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def loads(data):
+    """Parse JSON text or bytes.
+
+    orjson rejects NaN/Infinity and integers wider than 64 bits, which json
+    accepts, so input orjson refuses is parsed again with json.
+    """
+    if ORJSON_AVAILABLE:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def load_file(path):
+    """Parse a JSON file."""
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def dumps_bytes(obj, indent=False) -> bytes:
+    """UTF-8 JSON, indented by 2 spaces or compact on one line.
+
+    With orjson the output is equivalent JSON but not byte-identical to
+    json.dumps: some floats are spelled differently (1e-05 as 0.00001,
+    1.5e+20 as 1.5e20) and non-ASCII text is written unescaped. Values
+    orjson cannot encode, such as ints wider than 64 bits, go through json.
+    """
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, option=option)
+        except TypeError:
+            pass
+    if indent:
+        return json.dumps(obj, indent=2).encode()
+    return json.dumps(obj, separators=(",", ":")).encode()
+
+
+def dumps(obj, indent=False) -> str:
+    """JSON text, indented by 2 spaces or compact on one line; see dumps_bytes()."""
+    return dumps_bytes(obj, indent).decode()
@@ -1,16 +1,21 @@
 import argparse
-import base64
+import binascii
 import json
-import uuid
 from dotenv import load_dotenv
 import os
+import sys
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import requests
-from google.protobuf import any_pb2
+from requests.utils import DEFAULT_ACCEPT_ENCODING
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from google.protobuf.internal import api_implementation
 from proto.nestlabs.gateway import v1_pb2
 from proto.nestlabs.gateway import v2_pb2
 from proto.weave.trait import security_pb2 as weave_security_pb2
-from protobuf_handler import NestProtobufHandler
+from protobuf_handler import NestProtobufHandler, _frame_iter
 from const import (
   API_TIMEOUT_SECONDS,
   USER_AGENT_STRING,
@@ -21,6 +26,12 @@ from const import (
 )
 import requests
 
+# Observe decoding is dominated by protobuf parsing, which is far slower on the pure-Python backend
+if api_implementation.Type() == "python":
+  print("[main] Warning: protobuf is running its pure-Python implementation; "
+        "install protobuf>=4.21 (upb) for native parsing.", file=sys.stderr)
+
+
 def parse_args():
   parser = argparse.ArgumentParser(description="Inspect Yale lock state and optionally send a lock/unlock command.")
   parser.add_argument(
@@ -54,15 +65,68 @@ def _normalize_base(url: str | None) -> str | None:
   return url.rstrip("/")
 
 
-def _transport_candidates(session_base: str | None) -> list[str]:
+# Default gRPC-web base, formatted once instead of on every candidate lookup
+_DEFAULT_GRPC_BASE = _normalize_base(URL_PROTOBUF.format(grpc_hostname=PRODUCTION_HOSTNAME["grpc_hostname"]))
+
+
+@lru_cache(maxsize=4)
+def _transport_candidates(session_base: str | None) -> tuple[str, ...]:
   candidates = []
   normalized_session = _normalize_base(session_base)
   if normalized_session:
     candidates.append(normalized_session)
-  default = _normalize_base(URL_PROTOBUF.format(grpc_hostname=PRODUCTION_HOSTNAME["grpc_hostname"]))
+  default = _DEFAULT_GRPC_BASE
   if default and default not in candidates:
     candidates.append(default)
-  return candidates
+  return tuple(candidates)
+
+
+async def _observe(observe_response, handler, locks_data):
+  """Feed Observe chunks to the handler until user and structure ids are known."""
+  # Parse only whole StreamBody fields, however the network splits them
+  for frame in _frame_iter(observe_response.iter_content(chunk_size=65536)):
+    locks_data.update(await handler._process_message(frame))
+    # Stop as soon as both ids are known; anything still buffered is never parsed
+    if locks_data.get("user_id") and locks_data.get("structure_id"):
+      observe_response.close()
+      return
+
+
+def _post_observe(session, target_url, headers, payload):
+  """Open one Observe stream, raising on HTTP errors."""
+  response = session.post(target_url, headers=headers, data=payload, stream=True, timeout=(API_TIMEOUT_SECONDS, API_TIMEOUT_SECONDS))
+  response.raise_for_status()
+  return response
+
+
+def _close_probe(probe):
+  """Close an Observe stream that lost to an earlier transport candidate."""
+  if not probe.cancelled() and probe.exception() is None:
+    probe.result().close()
+
+
+def _new_request_id() -> str:
+  """Random request id in the usual 8-4-4-4-12 hex layout, without building a UUID object."""
+  h = os.urandom(16).hex()
+  return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+# Reused for every command; Clear() recycles the message instead of allocating a new tree
+_COMMAND_REQUEST = v1_pb2.ResourceCommandRequest()
+
+
+def _build_command_request(device_id, request_id, trait_label, type_url, value):
+  """Populate the shared ResourceCommandRequest for one trait command."""
+  request = _COMMAND_REQUEST
+  request.Clear()
+  resource_command = request.resourceCommands.add()
+  resource_command.command.type_url = type_url
+  resource_command.command.value = value
+  resource_command.traitLabel = trait_label
+  request.resourceRequest.resourceId = device_id
+  request.resourceRequest.requestId = request_id
+  return request
+
 
 # Google Access Token
 headers = {
@@ -73,10 +137,12 @@ headers = {
   'User-Agent': USER_AGENT_STRING,
   'timeout': f"{API_TIMEOUT_SECONDS}",
 }
-response = requests.request("GET", ISSUE_TOKEN, headers=headers)
+# One Session for every hop so connections are pooled and reused across the auth flow
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=Retry(total=2, backoff_factor=0.2)))
+response = session.request("GET", ISSUE_TOKEN, headers=headers)
 response_header_cookies = response.headers.get("Set-Cookie")
 google_access_token = response.json().get("access_token")
-session = requests.Session()
 
 # Exchange Google Access Token for Nest JWT
 nest_url = "https://nestauthproxyservice-pa.googleapis.com/v1/issue_jwt"
@@ -110,18 +176,25 @@ user_id = session_data.get("userid")
 transport_url = session_data.get("urls").get("transport_url") 
 
 
+# Headers shared by the Observe and SendCommand calls
+auth_header = f"Basic {access_token}"
+base_headers = {
+  'User-Agent': USER_AGENT_STRING,
+  'Authorization': auth_header,
+  'X-Accept-Content-Transfer-Encoding': 'binary',
+  'X-Accept-Response-Streaming': 'true',
+}
+
 # Get Lock data from Observe Endpoint
 headers_observe = {
-  'Accept-Encoding': 'gzip, deflate, br, zstd',
+  **base_headers,
+  # Only advertise encodings urllib3 can decode here (br/zstd need their libraries installed)
+  'Accept-Encoding': DEFAULT_ACCEPT_ENCODING,
   'Content-Type': 'application/x-protobuf',
-  'User-Agent': USER_AGENT_STRING,
-  'X-Accept-Response-Streaming': 'true',
   'Accept': 'application/x-protobuf',
   # 'x-nl-webapp-version': 'NlAppSDKVersion/8.15.0 NlSchemaVersion/2.1.20-87-gce5742894',
   'referer': 'https://home.nest.com/',
   'origin': 'https://home.nest.com',
-  'X-Accept-Content-Transfer-Encoding': 'binary',
-  'Authorization': 'Basic ' + access_token
 }
 
 # Build Observe Request Payload
@@ -146,15 +219,24 @@ payload_observe = req.SerializeToString()
 locks_data = {}
 observe_base = None
 observe_response = None
-for base_url in _transport_candidates(transport_url):
+candidates = _transport_candidates(transport_url)
+# Open every candidate at once so a dead endpoint costs one timeout rather than one per candidate;
+# results are still taken in preference order and the extra streams are closed
+probe_pool = ThreadPoolExecutor(max_workers=len(candidates))
+probes = [
+  probe_pool.submit(_post_observe, session, f"{base_url}{ENDPOINT_OBSERVE}", headers_observe, payload_observe)
+  for base_url in candidates
+]
+probe_pool.shutdown(wait=False)
+for base_url, probe in zip(candidates, probes):
+  if observe_response is not None:
+    probe.add_done_callback(_close_probe)
+    continue
   target_url = f"{base_url}{ENDPOINT_OBSERVE}"
   try:
     print(f"[main] Sending Observe request to {target_url}")
-    response = session.post(target_url, headers=headers_observe, data=payload_observe, stream=True, timeout=(API_TIMEOUT_SECONDS, API_TIMEOUT_SECONDS))
-    response.raise_for_status()
-    observe_response = response
+    observe_response = probe.result()
     observe_base = base_url
-    break
   except requests.HTTPError as err:
     status = err.response.status_code if err.response else "unknown"
     print(f"[main] Observe failed for {target_url} (status {status}): {err}")
@@ -166,17 +248,10 @@ if observe_response is None:
   raise SystemExit("Failed to open Observe stream against all transport endpoints.")
 
 handler = NestProtobufHandler()
-for chunk in observe_response.iter_content(chunk_size=None):
-  if chunk:
-    async def process_chunk(locks_data):
-      new_data = await handler._process_message(chunk)
-      locks_data.update(new_data)
-    asyncio.run(process_chunk(locks_data))
-  user_id = locks_data.get("user_id", None)
-  structure_id = locks_data.get("structure_id", None)
-  if user_id and structure_id:
-    observe_response.close()
-    break
+# One event loop for the whole stream rather than asyncio.run per chunk; the with block
+# hands the connection back to the pool even on errors so the command POST can reuse it
+with observe_response:
+  asyncio.run(_observe(observe_response, handler, locks_data))
 
 print ("######### OBSERVE DATA #########")
 print()
@@ -200,10 +275,7 @@ if args.device_id:
     raise SystemExit(f"Requested device_id '{args.device_id}' not found. Available locks: {available}")
   device_id = lock_info.get("device_id") or args.device_id
 else:
-  for lock_id, lock_info in locks.items():
-    if lock_info.get("device_id"):
-      device_id = lock_info["device_id"]
-      break
+  device_id = next((info["device_id"] for info in locks.values() if info.get("device_id")), None)
 
 if not device_id:
   session.close()
@@ -223,43 +295,31 @@ request = weave_security_pb2.BoltLockTrait.BoltLockChangeRequest()
 request.state = state
 request.boltLockActor.method = weave_security_pb2.BoltLockTrait.BOLT_LOCK_ACTOR_METHOD_REMOTE_USER_EXPLICIT
 request.boltLockActor.originator.resourceId = str(user_id)
-command = {
-  "traitLabel": "bolt_lock",
-  "command": {
-    "type_url": "type.nestlabs.com/weave.trait.security.BoltLockTrait.BoltLockChangeRequest",
-    "value": request.SerializeToString(),
-  }
-}
+command_value = request.SerializeToString()
 
-request_id = str(uuid.uuid4())
+request_id = _new_request_id()
 headers = {
-  "Authorization": f"Basic {access_token}",
+  **base_headers,
   "Content-Type": "application/x-protobuf",
-  "User-Agent": USER_AGENT_STRING,
-  "X-Accept-Content-Transfer-Encoding": "binary",
-  "X-Accept-Response-Streaming": "true",
   # "referer": "https://home.nest.com/",
   # "origin": "https://home.nest.com",
   # "x-nl-webapp-version": "NlAppSDKVersion/8.15.0 NlSchemaVersion/2.1.20-87-gce5742894",
   "request-id": request_id,
 }
 
-cmd_any = any_pb2.Any()
-cmd_any.type_url = command["command"]["type_url"]
-cmd_any.value = command["command"]["value"] if isinstance(command["command"]["value"], bytes) else command["command"]["value"].SerializeToString()
-
-resource_command = v1_pb2.ResourceCommand()
-resource_command.command.CopyFrom(cmd_any)
-resource_command.traitLabel = command["traitLabel"]
-
-request = v1_pb2.ResourceCommandRequest()
-request.resourceCommands.extend([resource_command])
-request.resourceRequest.resourceId = device_id
-request.resourceRequest.requestId = request_id
+request = _build_command_request(
+  device_id,
+  request_id,
+  "bolt_lock",
+  "type.nestlabs.com/weave.trait.security.BoltLockTrait.BoltLockChangeRequest",
+  command_value,
+)
 encoded_data = request.SerializeToString()
 
 print(f"###### COMMAND FOR {device_id} ({args.action}) ######")
-print(base64.b64encode(command["command"]["value"]))
+if args.dry_run:
+  # Only dry runs need the encoded payload for inspection
+  print(binascii.b2a_base64(command_value, newline=False).decode())
 print(request)
 print("###################################\n")
 if args.dry_run:
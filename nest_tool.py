@@ -7,18 +7,23 @@ Consolidates functionality from main.py, decode_traits.py, and related scripts.
 
 import argparse
 import asyncio
-import json
+import binascii
+import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
 from dotenv import load_dotenv
 import requests
-from proto.nestlabs.gateway import v2_pb2
-from google.protobuf import any_pb2
+from requests.utils import DEFAULT_ACCEPT_ENCODING
+
+from proto.nestlabs.gateway import v1_pb2, v2_pb2
+from google.protobuf.internal import api_implementation
 from proto.weave.trait import security_pb2 as weave_security_pb2
-import uuid
 
+import json_utils
 from auth import GetSessionWithAuth
 from const import (
     API_TIMEOUT_SECONDS,
@@ -28,9 +33,14 @@ from const import (
     URL_PROTOBUF,
     PRODUCTION_HOSTNAME
 )
-from protobuf_handler import NestProtobufHandler
+from protobuf_handler import NestProtobufHandler, _frame_iter
 from protobuf_handler_enhanced import EnhancedProtobufHandler
 
+# Observe decoding is dominated by protobuf parsing, which is far slower on the pure-Python backend
+if api_implementation.Type() == "python":
+    print("[nest_tool] Warning: protobuf is running its pure-Python implementation; "
+          "install protobuf>=4.21 (upb) for native parsing.", file=sys.stderr)
+
 load_dotenv()
 
 
@@ -41,16 +51,21 @@ def _normalize_base(url: str | None) -> str | None:
     return url.rstrip("/")
 
 
-def _transport_candidates(session_base: str | None) -> list[str]:
+# Default gRPC-web base, formatted once at import
+_DEFAULT_GRPC_BASE = _normalize_base(URL_PROTOBUF.format(grpc_hostname=PRODUCTION_HOSTNAME["grpc_hostname"]))
+
+
+@lru_cache(maxsize=4)
+def _transport_candidates(session_base: str | None) -> tuple[str, ...]:
     """Get transport URL candidates."""
     candidates = []
     normalized_session = _normalize_base(session_base)
     if normalized_session:
         candidates.append(normalized_session)
-    default = _normalize_base(URL_PROTOBUF.format(grpc_hostname=PRODUCTION_HOSTNAME["grpc_hostname"]))
+    default = _DEFAULT_GRPC_BASE
     if default and default not in candidates:
         candidates.append(default)
-    return candidates
+    return tuple(candidates)
 
 
 def _build_observe_payload(trait_names: Optional[list[str]] = None) -> bytes:
@@ -75,40 +90,67 @@ def _build_observe_payload(trait_names: Optional[list[str]] = None) -> bytes:
     return req.SerializeToString()
 
 
+# The default trait filter never changes, so serialize it once
+_OBSERVE_PAYLOAD = _build_observe_payload()
+
+_OBSERVE_HEADERS = {
+    # Only advertise encodings urllib3 can decode here (br/zstd need their libraries installed)
+    'Accept-Encoding': DEFAULT_ACCEPT_ENCODING,
+    'Content-Type': 'application/x-protobuf',
+    'User-Agent': USER_AGENT_STRING,
+    'X-Accept-Response-Streaming': 'true',
+    'Accept': 'application/x-protobuf',
+    'referer': 'https://home.nest.com/',
+    'origin': 'https://home.nest.com',
+    'X-Accept-Content-Transfer-Encoding': 'binary',
+}
+
+
+def _post_observe(session, target_url, headers, payload):
+    """Open one Observe stream, raising on HTTP errors."""
+    response = session.post(
+        target_url,
+        headers=headers,
+        data=payload,
+        stream=True,
+        timeout=(API_TIMEOUT_SECONDS, API_TIMEOUT_SECONDS)
+    )
+    response.raise_for_status()
+    return response
+
+
+def _close_probe(probe):
+    """Close an Observe stream that lost to an earlier transport candidate."""
+    if not probe.cancelled() and probe.exception() is None:
+        probe.result().close()
+
+
 async def _observe_stream(session, access_token, transport_url, handler, max_messages: Optional[int] = None):
     """Observe stream and process with handler."""
-    payload_observe = _build_observe_payload()
-    
-    headers_observe = {
-        'Accept-Encoding': 'gzip, deflate, br, zstd',
-        'Content-Type': 'application/x-protobuf',
-        'User-Agent': USER_AGENT_STRING,
-        'X-Accept-Response-Streaming': 'true',
-        'Accept': 'application/x-protobuf',
-        'referer': 'https://home.nest.com/',
-        'origin': 'https://home.nest.com',
-        'X-Accept-Content-Transfer-Encoding': 'binary',
-        'Authorization': 'Basic ' + access_token
-    }
+    payload_observe = _OBSERVE_PAYLOAD
+    headers_observe = {**_OBSERVE_HEADERS, 'Authorization': 'Basic ' + access_token}
     
     observe_response = None
     observe_base = None
     
-    for base_url in _transport_candidates(transport_url):
+    candidates = _transport_candidates(transport_url)
+    # Open every candidate at once so a dead endpoint costs one timeout rather than one per
+    # candidate; results are still taken in preference order and the extra streams are closed
+    probe_pool = ThreadPoolExecutor(max_workers=len(candidates))
+    probes = [
+        probe_pool.submit(_post_observe, session, f"{base_url}{ENDPOINT_OBSERVE}", headers_observe, payload_observe)
+        for base_url in candidates
+    ]
+    probe_pool.shutdown(wait=False)
+    for base_url, probe in zip(candidates, probes):
+        if observe_response is not None:
+            probe.add_done_callback(_close_probe)
+            continue
         target_url = f"{base_url}{ENDPOINT_OBSERVE}"
         try:
             print(f"[nest_tool] Connecting to {target_url}...", file=sys.stderr)
-            response = session.post(
-                target_url,
-                headers=headers_observe,
-                data=payload_observe,
-                stream=True,
-                timeout=(API_TIMEOUT_SECONDS, API_TIMEOUT_SECONDS)
-            )
-            response.raise_for_status()
-            observe_response = response
+            observe_response = probe.result()
             observe_base = base_url
-            break
         except requests.HTTPError as err:
             status = err.response.status_code if err.response else "unknown"
             print(f"[nest_tool] Failed for {target_url} (status {status}): {err}", file=sys.stderr)
@@ -122,28 +164,37 @@ async def _observe_stream(session, access_token, transport_url, handler, max_mes
     message_count = 0
     
     try:
-        for chunk in observe_response.iter_content(chunk_size=None):
-            if chunk:
-                new_data = await handler._process_message(chunk)
-                if isinstance(new_data, dict):
-                    locks_data.update(new_data)
-                message_count += 1
-                
-                # Check if we have enough data
-                user_id = locks_data.get("user_id") or locks_data.get("user_id")
-                structure_id = locks_data.get("structure_id")
-                if user_id and structure_id and max_messages is None:
-                    # Got initial snapshot, can break if not subscribing
-                    break
-                
-                if max_messages and message_count >= max_messages:
-                    break
+        # Parse only whole StreamBody fields, however the network splits them
+        for frame in _frame_iter(observe_response.iter_content(chunk_size=65536)):
+            new_data = await handler._process_message(frame)
+            if isinstance(new_data, dict):
+                locks_data.update(new_data)
+            message_count += 1
+            
+            # Check if we have enough data
+            user_id = locks_data.get("user_id")
+            structure_id = locks_data.get("structure_id")
+            if user_id and structure_id and max_messages is None:
+                # Got initial snapshot, can break if not subscribing
+                break
+            
+            if max_messages and message_count >= max_messages:
+                break
     finally:
         observe_response.close()
     
     return locks_data, observe_base
 
 
+def _new_request_id() -> str:
+    """Random request id in the usual 8-4-4-4-12 hex layout, without building a UUID object."""
+    h = os.urandom(16).hex()
+    return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+BOLT_LOCK_CHANGE_TYPE_URL = "type.nestlabs.com/weave.trait.security.BoltLockTrait.BoltLockChangeRequest"
+
+
 def _send_lock_command(session, access_token, device_id, user_id, structure_id, action: str, observe_base: Optional[str], transport_url: str, dry_run: bool = False):
     """Send lock/unlock command."""
     if action == "unlock":
@@ -158,15 +209,9 @@ def _send_lock_command(session, access_token, device_id, user_id, structure_id,
     request.boltLockActor.method = weave_security_pb2.BoltLockTrait.BOLT_LOCK_ACTOR_METHOD_REMOTE_USER_EXPLICIT
     request.boltLockActor.originator.resourceId = str(user_id)
     
-    command = {
-        "traitLabel": "bolt_lock",
-        "command": {
-            "type_url": "type.nestlabs.com/weave.trait.security.BoltLockTrait.BoltLockChangeRequest",
-            "value": request.SerializeToString(),
-        }
-    }
+    command_value = request.SerializeToString()
     
-    request_id = str(uuid.uuid4())
+    request_id = _new_request_id()
     headers = {
         "Authorization": f"Basic {access_token}",
         "Content-Type": "application/x-protobuf",
@@ -179,17 +224,12 @@ def _send_lock_command(session, access_token, device_id, user_id, structure_id,
     if structure_id:
         headers["X-Nest-Structure-Id"] = structure_id
     
-    cmd_any = any_pb2.Any()
-    cmd_any.type_url = command["command"]["type_url"]
-    cmd_any.value = command["command"]["value"] if isinstance(command["command"]["value"], bytes) else command["command"]["value"].SerializeToString()
-    
-    from proto.nestlabs.gateway import v1_pb2
-    resource_command = v1_pb2.ResourceCommand()
-    resource_command.command.CopyFrom(cmd_any)
-    resource_command.traitLabel = command["traitLabel"]
-    
+    # Fill the command in place rather than building an Any and ResourceCommand to copy in
     request_pb = v1_pb2.ResourceCommandRequest()
-    request_pb.resourceCommands.extend([resource_command])
+    resource_command = request_pb.resourceCommands.add()
+    resource_command.command.type_url = BOLT_LOCK_CHANGE_TYPE_URL
+    resource_command.command.value = command_value
+    resource_command.traitLabel = "bolt_lock"
     request_pb.resourceRequest.resourceId = device_id
     request_pb.resourceRequest.requestId = request_id
     encoded_data = request_pb.SerializeToString()
@@ -197,8 +237,7 @@ def _send_lock_command(session, access_token, device_id, user_id, structure_id,
     if dry_run:
         print("Dry-run enabled; skipping command dispatch.", file=sys.stderr)
         print(f"Command payload (base64):", file=sys.stderr)
-        import base64
-        print(base64.b64encode(command["command"]["value"]).decode(), file=sys.stderr)
+        print(binascii.b2a_base64(command_value, newline=False).decode(), file=sys.stderr)
         return None
     
     command_base_candidates = []
@@ -229,12 +268,24 @@ def _send_lock_command(session, access_token, device_id, user_id, structure_id,
     raise RuntimeError("Command failed for all transport endpoints.")
 
 
+# One handler per class, kept for the life of the process
+_HANDLERS = {}
+
+
+def _get_handler(handler_cls):
+    """Shared handler instance; its parsed StreamBody is cleared on every message."""
+    handler = _HANDLERS.get(handler_cls)
+    if handler is None:
+        handler = _HANDLERS[handler_cls] = handler_cls()
+    return handler
+
+
 def cmd_lock(args):
     """Lock control command."""
     session, access_token, user_id, transport_url = GetSessionWithAuth()
     
     try:
-        handler = NestProtobufHandler()
+        handler = _get_handler(NestProtobufHandler)
         locks_data, observe_base = asyncio.run(_observe_stream(session, access_token, transport_url, handler))
         
         locks = locks_data.get("yale", {})
@@ -247,10 +298,7 @@ def cmd_lock(args):
                 raise SystemExit(f"Requested device_id '{args.device_id}' not found. Available locks: {available}")
             device_id = lock_info.get("device_id") or args.device_id
         else:
-            for lock_id, lock_info in locks.items():
-                if lock_info.get("device_id"):
-                    device_id = lock_info["device_id"]
-                    break
+            device_id = next((info["device_id"] for info in locks.values() if info.get("device_id")), None)
         
         if not device_id:
             raise SystemExit("No Yale lock device_id discovered; nothing to control.")
@@ -265,7 +313,7 @@ def cmd_lock(args):
                 "user_id": locks_data.get("user_id"),
                 "structure_id": locks_data.get("structure_id"),
             }
-            print(json.dumps(output, indent=2))
+            print(json_utils.dumps(output, indent=True))
             return
         
         # Send command
@@ -278,11 +326,11 @@ def cmd_lock(args):
         
         if response:
             print("Command sent successfully.", file=sys.stderr)
-            print(json.dumps({
+            print(json_utils.dumps({
                 "status": "success",
                 "device_id": device_id,
                 "action": args.action
-            }, indent=2))
+            }, indent=True))
     finally:
         session.close()
 
@@ -292,11 +340,11 @@ def cmd_decode(args):
     session, access_token, user_id, transport_url = GetSessionWithAuth()
     
     try:
-        handler = EnhancedProtobufHandler()
+        handler = _get_handler(EnhancedProtobufHandler)
         locks_data, _ = asyncio.run(_observe_stream(session, access_token, transport_url, handler, max_messages=args.limit))
         
         if args.format == "json":
-            print(json.dumps(locks_data, indent=2))
+            print(json_utils.dumps(locks_data, indent=True))
         elif args.format == "pretty":
             _print_pretty_traits(locks_data)
         else:  # table
@@ -307,34 +355,36 @@ def cmd_decode(args):
 
 def _print_pretty_traits(locks_data):
     """Print traits in a pretty format."""
-    print("=" * 80)
-    print("DECODED TRAITS")
-    print("=" * 80)
-    print()
+    # Collect every line and write once instead of one print() per line
+    lines = []
+    lines.append("=" * 80)
+    lines.append("DECODED TRAITS")
+    lines.append("=" * 80)
+    lines.append("")
     
     locks = locks_data.get("yale", {})
     if locks:
-        print("🔒 Lock Data:")
+        lines.append("🔒 Lock Data:")
         for device_id, lock_info in locks.items():
-            print(f"  Device: {device_id}")
-            print(f"    Locked: {lock_info.get('bolt_locked')}")
-            print(f"    Moving: {lock_info.get('bolt_moving')}")
-        print()
+            lines.append(f"  Device: {device_id}")
+            lines.append(f"    Locked: {lock_info.get('bolt_locked')}")
+            lines.append(f"    Moving: {lock_info.get('bolt_moving')}")
+        lines.append("")
     
     user_id = locks_data.get("user_id")
     if user_id:
-        print(f"👤 User ID: {user_id}")
-        print()
+        lines.append(f"👤 User ID: {user_id}")
+        lines.append("")
     
     structure_id = locks_data.get("structure_id")
     if structure_id:
-        print(f"🏠 Structure ID: {structure_id}")
-        print()
+        lines.append(f"🏠 Structure ID: {structure_id}")
+        lines.append("")
     
     all_traits = locks_data.get("all_traits", {})
     if all_traits:
-        print(f"📊 Decoded Traits ({len(all_traits)}):")
-        print()
+        lines.append(f"📊 Decoded Traits ({len(all_traits)}):")
+        lines.append("")
         
         for trait_key, trait_info in sorted(all_traits.items()):
             obj_id, type_url = trait_key.split(":", 1) if ":" in trait_key else (None, trait_key)
@@ -344,14 +394,16 @@ def _print_pretty_traits(locks_data):
             trait_name = type_url.split(".")[-1] if "." in type_url else type_url
             status = "✅" if decoded else "⚠️"
             
-            print(f"  {status} {trait_name}")
+            lines.append(f"  {status} {trait_name}")
             if obj_id:
-                print(f"      Object: {obj_id}")
+                lines.append(f"      Object: {obj_id}")
             if decoded and data:
-                print(f"      Data:")
+                lines.append(f"      Data:")
                 for key, value in data.items():
-                    print(f"        {key}: {value}")
-            print()
+                    lines.append(f"        {key}: {value}")
+            lines.append("")
+    
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def _print_table_traits(locks_data):
@@ -389,14 +441,17 @@ def _print_table_traits(locks_data):
             table.add_column("Status", style="green")
             table.add_column("Data", style="yellow")
             
+            status_decoded = "✅ Decoded"
+            status_not_decoded = "⚠️  Not decoded"
             for trait_key, trait_info in sorted(all_traits.items()):
                 obj_id, type_url = trait_key.split(":", 1) if ":" in trait_key else (None, trait_key)
                 decoded = trait_info.get("decoded", False)
                 data = trait_info.get("data", {})
                 
                 trait_name = type_url.split(".")[-1] if "." in type_url else type_url
-                status = "✅ Decoded" if decoded else "⚠️  Not decoded"
-                data_str = json.dumps(data, indent=2) if data else "N/A"
+                status = status_decoded if decoded else status_not_decoded
+                # Compact JSON; the cell only shows the first 100 characters anyway
+                data_str = json_utils.dumps(data) if data else "N/A"
                 
                 table.add_row(
                     trait_name,
@@ -13,34 +13,51 @@ This tool is service-agnostic and can work with any protobuf messages.
 """
 
 import argparse
-import base64
+import binascii
 import json
+import struct
 import sys
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterable, Iterator, List
 import importlib
 import importlib.util
 
-try:
-    import requests
-    REQUESTS_AVAILABLE = True
-except ImportError:
-    REQUESTS_AVAILABLE = False
-
-try:
-    from google.protobuf import message_factory, descriptor_pool, descriptor_database
-    from google.protobuf.descriptor_pb2 import FileDescriptorProto
-    from google.protobuf import json_format
-    PROTOBUF_AVAILABLE = True
-except ImportError:
-    PROTOBUF_AVAILABLE = False
+import json_utils
+
+
+def _module_available(name: str) -> bool:
+    """Check whether a module can be imported, without importing it."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ImportError:
+        return False
+
+
+# requests, protobuf and blackboxprotobuf are imported on first use (see _lazy)
+# so that --help, info and simple decodes don't pay for all of them at startup
+REQUESTS_AVAILABLE = _module_available("requests")
+PROTOBUF_AVAILABLE = _module_available("google.protobuf")
+BLACKBOX_AVAILABLE = _module_available("blackboxprotobuf")
+
+if not PROTOBUF_AVAILABLE:
     print("Warning: protobuf not available. Install with: pip install protobuf", file=sys.stderr)
 
-try:
-    import blackboxprotobuf as bbp
-    BLACKBOX_AVAILABLE = True
-except ImportError:
-    BLACKBOX_AVAILABLE = False
+_LAZY_MODULES: Dict[str, Any] = {}
+
+
+# Whitespace dropped from hex/base64 input in one pass
+_WHITESPACE = str.maketrans("", "", " \t\n\r\f\v")
+
+# gRPC-web frame header: 1 byte frame type, 4 byte big-endian payload length
+_GRPC_WEB_HEADER = struct.Struct(">BI")
+
+
+def _lazy(name: str):
+    """Import a module the first time it is needed and cache it."""
+    module = _LAZY_MODULES.get(name)
+    if module is None:
+        module = _LAZY_MODULES[name] = importlib.import_module(name)
+    return module
 
 
 class ProtoDecoder:
@@ -57,12 +74,16 @@ class ProtoDecoder:
         self.proto_module = proto_module
         self.descriptor_pool = None
         self.message_factory = None
+        # Message classes by full type name, resolved once per decoder
+        self._class_cache: Dict[str, Any] = {}
         
         if PROTOBUF_AVAILABLE:
             self._setup_descriptor_pool()
     
     def _setup_descriptor_pool(self):
         """Set up descriptor pool for proto files."""
+        descriptor_pool = _lazy("google.protobuf.descriptor_pool")
+        descriptor_database = _lazy("google.protobuf.descriptor_database")
         self.descriptor_pool = descriptor_pool.DescriptorPool()
         self.descriptor_db = descriptor_database.DescriptorDatabase()
         
@@ -76,33 +97,31 @@ class ProtoDecoder:
     
     def _load_proto_files(self, path: Path):
         """Load all pb2.py files from a directory."""
-        import importlib
-        import os
-        
-        for root, dirs, files in os.walk(path):
-            for file in files:
-                if file.endswith('pb2.py') and not file.startswith('__'):
-                    module_path = Path(root) / file
-                    module_name = str(module_path.relative_to(path)).replace(os.sep, '.').replace('.py', '')
+        FileDescriptorProto = _lazy("google.protobuf.descriptor_pb2").FileDescriptorProto
+        for module_path in path.rglob('*pb2.py'):
+            if module_path.name.startswith('__'):
+                continue
+            module_name = '.'.join(module_path.relative_to(path).with_suffix('').parts)
+            
+            try:
+                spec = importlib.util.spec_from_file_location(module_name, module_path)
+                if spec and spec.loader:
+                    module = importlib.util.module_from_spec(spec)
+                    spec.loader.exec_module(module)
                     
-                    try:
-                        spec = importlib.util.spec_from_file_location(module_name, module_path)
-                        if spec and spec.loader:
-                            module = importlib.util.module_from_spec(spec)
-                            spec.loader.exec_module(module)
-                            
-                            # Add to descriptor pool
-                            if hasattr(module, 'DESCRIPTOR'):
-                                desc = module.DESCRIPTOR
-                                serialized_desc = desc.serialized_pb
-                                file_desc = FileDescriptorProto()
-                                file_desc.ParseFromString(serialized_desc)
-                                self.descriptor_db.Add(file_desc)
-                    except Exception as e:
-                        print(f"Warning: Could not load {module_path}: {e}", file=sys.stderr)
+                    # Add to descriptor pool
+                    if hasattr(module, 'DESCRIPTOR'):
+                        desc = module.DESCRIPTOR
+                        serialized_desc = desc.serialized_pb
+                        file_desc = FileDescriptorProto()
+                        file_desc.ParseFromString(serialized_desc)
+                        self.descriptor_db.Add(file_desc)
+            except Exception as e:
+                print(f"Warning: Could not load {module_path}: {e}", file=sys.stderr)
     
     def _load_proto_module(self, module_name: str):
         """Load proto definitions from a Python module."""
+        FileDescriptorProto = _lazy("google.protobuf.descriptor_pb2").FileDescriptorProto
         try:
             module = importlib.import_module(module_name)
             # Try to find all pb2 modules in the package
@@ -127,93 +146,125 @@ class ProtoDecoder:
         """Decode a varint from bytes."""
         value = 0
         shift = 0
-        start = pos
-        max_bytes = 10
+        data_len = len(data)
         
-        while pos < len(data) and shift < 64:
-            if pos >= len(data):
-                return None, pos
+        while pos < data_len:
             byte = data[pos]
-            value |= (byte & 0x7F) << shift
             pos += 1
-            shift += 7
-            if not (byte & 0x80):
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
                 return value, pos
-            if pos - start >= max_bytes:
+            shift += 7
+            if shift >= 70:  # more than the 10 bytes of a 64-bit varint
                 return None, pos
         
         return None, pos
     
-    def extract_messages(self, data: bytes, format: str = "auto") -> List[bytes]:
+    def _detect_format(self, data: bytes) -> str:
+        """Guess the framing of a protobuf byte stream."""
+        if len(data) >= 5 and data[0] in (0x00, 0x80):
+            return "grpc-web"
+        elif len(data) > 0 and data[0] < 0x80:
+            return "varint"
+        return "raw"
+    
+    def extract_messages(self, data: bytes, format: str = "auto") -> List[memoryview]:
         """Extract protobuf messages from raw data.
         
         Supports:
         - gRPC-web frame format (0x00/0x80 prefix)
         - Varint length prefix
         - Raw protobuf (no prefix)
-        """
-        messages = []
         
+        Messages are returned as memoryview slices of data, without copying.
+        """
         if format == "auto":
-            # Try to detect format
-            if len(data) >= 5 and data[0] in (0x00, 0x80):
-                format = "grpc-web"
-            elif len(data) > 0 and data[0] < 0x80:
-                format = "varint"
+            format = self._detect_format(data)
+        return self._extractor(format)(self, data)[0]
+    
+    # Each extractor returns the complete messages in data and the number of
+    # bytes they consumed
+    
+    def _extract_grpc_web(self, data: bytes) -> tuple[List[memoryview], int]:
+        """Split gRPC-web frames (1 byte type, 4 byte big-endian length)."""
+        messages = []
+        pos = 0
+        view = memoryview(data)
+        data_len = len(view)
+        while pos + 5 <= data_len:
+            # Read each 5-byte frame header in one call
+            frame_type, frame_len = _GRPC_WEB_HEADER.unpack_from(view, pos)
+            
+            if pos + 5 + frame_len > data_len and frame_type in (0x00, 0x80):
+                break  # Incomplete frame
+            if frame_type == 0x00:  # Data frame
+                messages.append(view[pos+5:pos+5+frame_len])
+                pos += 5 + frame_len
+            elif frame_type == 0x80:  # Skip frame
+                pos += 5 + frame_len
+            else:
+                pos += 1
+        return messages, pos
+    
+    def _extract_varint(self, data: bytes) -> tuple[List[memoryview], int]:
+        """Split varint length-prefixed messages."""
+        messages = []
+        pos = 0
+        view = memoryview(data)
+        data_len = len(data)
+        while pos < data_len:
+            length = data[pos]
+            if length < 0x80:  # Single-byte length, the common case
+                offset = pos + 1
             else:
-                format = "raw"
-        
-        if format == "grpc-web":
-            pos = 0
-            while pos < len(data):
-                if pos + 5 > len(data):
-                    break
-                
-                frame_type = data[pos]
-                frame_len = int.from_bytes(data[pos+1:pos+5], "big")
-                
-                if frame_type == 0x00:  # Data frame
-                    if pos + 5 + frame_len <= len(data):
-                        messages.append(data[pos+5:pos+5+frame_len])
-                        pos += 5 + frame_len
-                    else:
-                        break
-                elif frame_type == 0x80:  # Skip frame
-                    pos += 5 + frame_len
-                else:
-                    pos += 1
-        
-        elif format == "varint":
-            pos = 0
-            while pos < len(data):
                 length, offset = self.decode_varint(data, pos)
-                if length is None or length == 0:
-                    break
-                if offset + length <= len(data):
-                    messages.append(data[offset:offset+length])
-                    pos = offset + length
-                else:
-                    break
-        
-        else:  # raw
-            messages = [data]
-        
-        return messages
+            if length is None or length == 0:
+                break
+            if offset + length <= data_len:
+                messages.append(view[offset:offset+length])
+                pos = offset + length
+            else:
+                break
+        return messages, pos
+    
+    def _extract_raw(self, data: bytes) -> tuple[List[memoryview], int]:
+        """Treat the whole input as one unframed message."""
+        return [memoryview(data)], len(data)
     
-    def decode_with_proto(self, message: bytes, message_type: str) -> Optional[Dict[str, Any]]:
-        """Decode message using known proto definition."""
+    _EXTRACTORS = {
+        "grpc-web": _extract_grpc_web,
+        "varint": _extract_varint,
+        "raw": _extract_raw,
+    }
+    
+    def _extractor(self, format: str):
+        """Extractor function for a resolved (non-auto) format."""
+        return self._EXTRACTORS.get(format, ProtoDecoder._extract_raw)
+    
+    def decode_with_proto(self, message: bytes, message_type: str, raw: bool = False) -> Optional[Any]:
+        """Decode message using known proto definition.
+        
+        Returns a dict, or the parsed message itself when raw is True (skips
+        the MessageToDict conversion for callers that only read fields).
+        """
         if not PROTOBUF_AVAILABLE:
             return None
         
+        message_factory = _lazy("google.protobuf.message_factory")
         try:
-            # Try to find message type in descriptor pool
-            descriptor = self.descriptor_pool.FindMessageTypeByName(message_type)
-            message_class = message_factory.GetMessageClass(descriptor)
+            message_class = self._class_cache.get(message_type)
+            if message_class is None:
+                # Try to find message type in descriptor pool
+                descriptor = self.descriptor_pool.FindMessageTypeByName(message_type)
+                message_class = message_factory.GetMessageClass(descriptor)
+                self._class_cache[message_type] = message_class
             msg = message_class()
             msg.ParseFromString(message)
+            if raw:
+                return msg
             
             # Convert to dict
-            return json_format.MessageToDict(msg)
+            return _lazy("google.protobuf.json_format").MessageToDict(msg)
         except Exception as e:
             return None
     
@@ -223,16 +274,47 @@ class ProtoDecoder:
             return {"error": "blackboxprotobuf not available"}
         
         try:
-            decoded, typedef = bbp.protobuf_to_json(message)
+            bbp = _lazy("blackboxprotobuf")
+            decoded, typedef = bbp.protobuf_to_json(bytes(message))
+            if isinstance(decoded, str):
+                decoded = json_utils.loads(decoded)
             return {
-                "decoded": json.loads(decoded) if isinstance(decoded, str) else decoded,
+                "decoded": decoded,
                 "typedef": typedef
             }
         except Exception as e:
             return {"error": str(e)}
     
+    def _decode_message(self, index: int, message: bytes, message_type: Optional[str],
+                        use_blackbox: bool, include_preview: bool = True) -> Dict[str, Any]:
+        """Decode a single extracted message into a result entry."""
+        msg_result = {
+            "message_index": index,
+            "size_bytes": len(message),
+        }
+        if include_preview:
+            msg_result["hex_preview"] = message[:50].hex() + ("..." if len(message) > 50 else "")
+        
+        # Try proto-based decoding first
+        if message_type:
+            decoded = self.decode_with_proto(message, message_type)
+            if decoded:
+                msg_result["decoded"] = decoded
+                msg_result["decoder"] = "proto"
+        
+        # Fall back to blackbox if needed
+        if "decoded" not in msg_result and use_blackbox:
+            blackbox_result = self.decode_with_blackbox(message)
+            if "error" not in blackbox_result:
+                msg_result["decoded"] = blackbox_result.get("decoded")
+                msg_result["typedef"] = blackbox_result.get("typedef")
+                msg_result["decoder"] = "blackbox"
+        
+        return msg_result
+    
     def decode(self, data: bytes, message_type: Optional[str] = None, 
-               format: str = "auto", use_blackbox: bool = False) -> Dict[str, Any]:
+               format: str = "auto", use_blackbox: bool = False,
+               include_preview: bool = True) -> Dict[str, Any]:
         """Decode protobuf data.
         
         Args:
@@ -240,6 +322,7 @@ class ProtoDecoder:
             message_type: Optional message type name (e.g., "nest.rpc.StreamBody")
             format: Format of data ("auto", "grpc-web", "varint", "raw")
             use_blackbox: Use blackboxprotobuf if proto definition not found
+            include_preview: Add a hex preview of each message
         
         Returns:
             Dictionary with decoded data
@@ -254,29 +337,61 @@ class ProtoDecoder:
         result["message_count"] = len(messages)
         
         for i, message in enumerate(messages):
-            msg_result = {
-                "message_index": i,
-                "size_bytes": len(message),
-                "hex_preview": message[:50].hex() + ("..." if len(message) > 50 else "")
-            }
-            
-            # Try proto-based decoding first
-            if message_type:
-                decoded = self.decode_with_proto(message, message_type)
-                if decoded:
-                    msg_result["decoded"] = decoded
-                    msg_result["decoder"] = "proto"
-            
-            # Fall back to blackbox if needed
-            if "decoded" not in msg_result and use_blackbox:
-                blackbox_result = self.decode_with_blackbox(message)
-                if "error" not in blackbox_result:
-                    msg_result["decoded"] = blackbox_result.get("decoded")
-                    msg_result["typedef"] = blackbox_result.get("typedef")
-                    msg_result["decoder"] = "blackbox"
+            result["messages"].append(
+                self._decode_message(i, message, message_type, use_blackbox, include_preview))
+        
+        return result
+    
+    def decode_stream(self, chunks: Iterable[bytes], message_type: Optional[str] = None,
+                      format: str = "auto", use_blackbox: bool = False,
+                      include_preview: bool = True) -> Dict[str, Any]:
+        """Decode protobuf data while it arrives.
+        
+        Complete messages are decoded as soon as their last chunk is in, and
+        only the unparsed tail is kept buffered. Takes the same options and
+        returns the same result as decode().
+        """
+        result = {
+            "format_detected": format,
+            "messages": []
+        }
+        messages = result["messages"]
+        buffer = bytearray()
+        # The format is fixed after the first chunk, so pick the extractor once
+        extract = None if format == "auto" else self._extractor(format)
+        
+        for chunk in chunks:
+            buffer += chunk
+            if format == "auto":
+                if len(buffer) < 5:
+                    continue  # Not enough to tell gRPC-web from varint yet
+                format = self._detect_format(buffer)
+                extract = self._extractor(format)
+            if format == "raw":
+                continue  # Unframed; decoded as one message at the end
             
-            result["messages"].append(msg_result)
+            extracted, consumed = extract(self, buffer)
+            for message in extracted:
+                messages.append(self._decode_message(
+                    len(messages), message, message_type, use_blackbox, include_preview))
+            # The extracted views point into buffer; drop them before resizing it
+            extracted = message = None
+            del buffer[:consumed]
+        
+        if format == "auto":
+            # Under 5 bytes arrived in total, so nothing was framed in the loop
+            format = self._detect_format(buffer)
+            if format != "raw":
+                extracted, _ = self._extractor(format)(self, buffer)
+                for message in extracted:
+                    messages.append(self._decode_message(
+                        len(messages), message, message_type, use_blackbox, include_preview))
+                extracted = message = None
+        if format == "raw" and buffer:
+            messages.append(self._decode_message(
+                len(messages), bytes(buffer), message_type, use_blackbox, include_preview))
         
+        result["message_count"] = len(messages)
         return result
 
 
@@ -290,15 +405,28 @@ def load_data_from_file(file_path: Path, encoding: str = "binary") -> bytes:
     if encoding == "binary":
         return file_path.read_bytes()
     elif encoding == "hex":
-        hex_str = file_path.read_text().strip().replace(" ", "").replace("\n", "")
-        return bytes.fromhex(hex_str)
+        return binascii.a2b_hex(file_path.read_text().translate(_WHITESPACE))
     elif encoding == "base64":
-        base64_str = file_path.read_text().strip().replace(" ", "").replace("\n", "")
-        return base64.b64decode(base64_str)
+        return binascii.a2b_base64(file_path.read_text().translate(_WHITESPACE))
     else:
         raise ValueError(f"Unknown encoding: {encoding}")
 
 
+_SESSION = None
+
+
+def _get_session():
+    """Shared requests session, so repeated fetches reuse pooled connections."""
+    global _SESSION
+    if _SESSION is None:
+        requests = _lazy("requests")
+        adapter = _lazy("requests.adapters").HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        _SESSION = requests.Session()
+        _SESSION.mount("https://", adapter)
+        _SESSION.mount("http://", adapter)
+    return _SESSION
+
+
 def fetch_data_from_url(
     url: str,
     method: str = "GET",
@@ -318,13 +446,14 @@ def fetch_data_from_url(
         timeout: Request timeout in seconds
     
     Returns:
-        Response data as bytes
+        Response data as bytes (a bytearray when streamed)
     """
     if not REQUESTS_AVAILABLE:
         raise ImportError("requests library required for URL fetching. Install with: pip install requests")
     
+    requests = _lazy("requests")
     try:
-        response = requests.request(
+        response = _get_session().request(
             method=method,
             url=url,
             headers=headers,
@@ -335,18 +464,53 @@ def fetch_data_from_url(
         response.raise_for_status()
         
         if stream:
-            # For streaming, read all chunks
-            chunks = []
-            for chunk in response.iter_content(chunk_size=None):
-                if chunk:
-                    chunks.append(chunk)
-            return b''.join(chunks)
+            # For streaming, grow one buffer in place instead of joining a
+            # list of chunks (which briefly holds the body twice)
+            buffer = bytearray()
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                buffer += chunk
+            return buffer
         else:
             return response.content
     except requests.RequestException as e:
         raise RuntimeError(f"Failed to fetch from URL {url}: {e}")
 
 
+def iter_url_bytes(
+    url: str,
+    method: str = "GET",
+    headers: Optional[Dict[str, str]] = None,
+    data: Optional[bytes] = None,
+    timeout: int = 30,
+    chunk_size: int = 64 * 1024
+) -> Iterator[bytes]:
+    """Stream the response body of a URL request chunk by chunk.
+    
+    Takes the same arguments as fetch_data_from_url(), but yields the body
+    as it arrives so ProtoDecoder.decode_stream() can start decoding early.
+    The request is sent when iteration starts.
+    """
+    if not REQUESTS_AVAILABLE:
+        raise ImportError("requests library required for URL fetching. Install with: pip install requests")
+    
+    requests = _lazy("requests")
+    try:
+        with _get_session().request(
+            method=method,
+            url=url,
+            headers=headers,
+            data=data,
+            stream=True,
+            timeout=timeout
+        ) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                if chunk:
+                    yield chunk
+    except requests.RequestException as e:
+        raise RuntimeError(f"Failed to fetch from URL {url}: {e}")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="General-purpose Protobuf Decoder - Decode protobuf messages from any service",
@@ -502,6 +666,7 @@ Examples:
     
     if args.command == "decode":
         # Load data
+        chunks = None
         if args.url:
             # Fetch from URL
             try:
@@ -523,37 +688,44 @@ Examples:
                         # Try as hex or base64 string
                         try:
                             # Try hex first
-                            post_data = bytes.fromhex(args.post_data.replace(" ", "").replace("\n", ""))
+                            post_data = binascii.a2b_hex(args.post_data.translate(_WHITESPACE))
                         except ValueError:
                             try:
                                 # Try base64
-                                post_data = base64.b64decode(args.post_data.replace(" ", "").replace("\n", ""))
+                                post_data = binascii.a2b_base64(args.post_data.translate(_WHITESPACE))
                             except Exception as e:
                                 print(f"Error: Could not parse --post-data as hex, base64, or file: {e}", file=sys.stderr)
                                 return 1
                 
-                data = fetch_data_from_url(
-                    args.url,
-                    method=args.method,
-                    headers=headers,
-                    data=post_data,
-                    stream=args.stream,
-                    timeout=args.timeout
-                )
+                if args.stream:
+                    # Decoded incrementally below, as the response arrives
+                    chunks = iter_url_bytes(
+                        args.url,
+                        method=args.method,
+                        headers=headers,
+                        data=post_data,
+                        timeout=args.timeout
+                    )
+                else:
+                    data = fetch_data_from_url(
+                        args.url,
+                        method=args.method,
+                        headers=headers,
+                        data=post_data,
+                        timeout=args.timeout
+                    )
             except Exception as e:
                 print(f"Error fetching from URL: {e}", file=sys.stderr)
                 return 1
         elif args.hex:
             try:
-                hex_str = args.hex.replace(" ", "").replace("\n", "")
-                data = bytes.fromhex(hex_str)
+                data = binascii.a2b_hex(args.hex.translate(_WHITESPACE))
             except ValueError as e:
                 print(f"Error: Invalid hex string: {e}", file=sys.stderr)
                 return 1
         elif args.base64:
             try:
-                base64_str = args.base64.replace(" ", "").replace("\n", "")
-                data = base64.b64decode(base64_str)
+                data = binascii.a2b_base64(args.base64.translate(_WHITESPACE))
             except Exception as e:
                 print(f"Error: Invalid base64 string: {e}", file=sys.stderr)
                 return 1
@@ -577,16 +749,30 @@ Examples:
         )
         
         # Decode
-        result = decoder.decode(
-            data,
-            message_type=args.message_type,
-            format=args.format,
-            use_blackbox=args.blackbox
-        )
+        if chunks is not None:
+            try:
+                result = decoder.decode_stream(
+                    chunks,
+                    message_type=args.message_type,
+                    format=args.format,
+                    use_blackbox=args.blackbox,
+                    include_preview=args.output == "pretty"
+                )
+            except Exception as e:
+                print(f"Error fetching from URL: {e}", file=sys.stderr)
+                return 1
+        else:
+            result = decoder.decode(
+                data,
+                message_type=args.message_type,
+                format=args.format,
+                use_blackbox=args.blackbox,
+                include_preview=args.output == "pretty"
+            )
         
         # Output
         if args.output == "json":
-            print(json.dumps(result, indent=2))
+            print(json_utils.dumps(result, indent=True))
         else:
             _print_pretty(result)
     
@@ -1,7 +1,9 @@
 from google.protobuf import json_format, descriptor_database, descriptor_pool
 from google.protobuf.descriptor_pb2 import FileDescriptorProto
-import json
+import hashlib
 import importlib
+import struct
+from pathlib import Path
 from google.protobuf import any_pb2, duration_pb2, timestamp_pb2, wrappers_pb2
 
 from proto.nestlabs.gateway import v2_pb2
@@ -16,10 +18,17 @@ from const import (
     SSL_VERIFY_PATH,
 )
 
-# Loads all pb2 files into a descriptor pool for use in json_format
+# Descriptor pool for json_format, filled on first use by get_pool()
 proto_db = descriptor_database.DescriptorDatabase()
 proto_pool = descriptor_pool.DescriptorPool(proto_db)
-import os
+_pool_built = False
+
+# Serialized descriptors of the pb2 tree, keyed by a hash of its file stats. Stored as
+# plain length-prefixed blobs next to proto/, never unpickled or looked up in the CWD
+_BASE_DIR = Path(__file__).resolve().parent
+_POOL_CACHE_PATH = _BASE_DIR / '.proto_pool_cache'
+_POOL_CACHE_MAGIC = b'PROTOPOOL1'
+_BLOB_LENGTH = struct.Struct('>I')
 
 _GOOGLE_DEPENDENCIES = (
     any_pb2.DESCRIPTOR,
@@ -28,23 +37,89 @@ _GOOGLE_DEPENDENCIES = (
     wrappers_pb2.DESCRIPTOR,
 )
 
-for desc in _GOOGLE_DEPENDENCIES:
-  serialized_desc = desc.serialized_pb
-  file_descriptor = FileDescriptorProto()
-  file_descriptor.ParseFromString(serialized_desc)
-  proto_db.Add(file_descriptor)
-
-for root, dirs, files in os.walk('proto'):
-  for file in files:
-    if file.endswith('pb2.py') and not file.startswith('__'):
-      module_name = os.path.splitext(os.path.join(root, file))[0].replace(os.sep, '.')
-
-      desc = getattr(importlib.import_module(module_name), "DESCRIPTOR")
-      serialized_desc = desc.serialized_pb
-      desc = FileDescriptorProto()
-      desc.ParseFromString(serialized_desc)
+def _pb2_files():
+  """pb2 modules under proto/, relative to the repo root."""
+  return [
+      path.relative_to(_BASE_DIR)
+      for path in (_BASE_DIR / 'proto').rglob('*pb2.py')
+      if not path.name.startswith('__')
+  ]
+
+def _tree_key(pb2_files):
+  digest = hashlib.sha1()
+  for path in sorted(pb2_files):
+    stat = (_BASE_DIR / path).stat()
+    digest.update(f"{path}\0{stat.st_mtime_ns}\0{stat.st_size}\n".encode())
+  return digest.hexdigest()
+
+def _pool_cache_header(key, count):
+  return b'%s %s %d\n' % (_POOL_CACHE_MAGIC, key.encode(), count)
+
+def _load_pool_cache(key):
+  """Cached descriptor blobs for this tree key, or None if missing, stale or damaged."""
+  try:
+    data = _POOL_CACHE_PATH.read_bytes()
+  except OSError:
+    return None
+  header, sep, _ = data.partition(b'\n')
+  parts = header.split(b' ')
+  if not sep or len(parts) != 3 or parts[0] != _POOL_CACHE_MAGIC or parts[1] != key.encode():
+    return None
+  try:
+    count = int(parts[2])
+  except ValueError:
+    return None
+  blobs = []
+  pos = len(header) + 1
+  while pos < len(data):
+    if pos + _BLOB_LENGTH.size > len(data):
+      return None
+    (length,) = _BLOB_LENGTH.unpack_from(data, pos)
+    pos += _BLOB_LENGTH.size
+    if pos + length > len(data):
+      return None
+    blobs.append(data[pos:pos + length])
+    pos += length
+  return blobs if len(blobs) == count else None
+
+def _save_pool_cache(key, blobs):
+  chunks = [_pool_cache_header(key, len(blobs))]
+  for blob in blobs:
+    chunks.append(_BLOB_LENGTH.pack(len(blob)))
+    chunks.append(blob)
+  try:
+    _POOL_CACHE_PATH.write_bytes(b''.join(chunks))
+  except OSError as e:
+    print(f"Could not write descriptor cache {_POOL_CACHE_PATH}: {e}")
+
+def get_pool():
+  """Load every pb2 descriptor into proto_pool, once per process.
+
+  The serialized descriptors are cached on disk, so unchanged trees are
+  loaded without importing each pb2 module.
+  """
+  global _pool_built
+  if _pool_built:
+    return proto_pool
+
+  for desc in _GOOGLE_DEPENDENCIES:
+    proto_db.Add(FileDescriptorProto.FromString(desc.serialized_pb))
+
+  pb2_files = _pb2_files()
+  key = _tree_key(pb2_files)
+  blobs = _load_pool_cache(key)
+  if blobs is None:
+    blobs = []
+    for path in pb2_files:
+      module_name = '.'.join(path.with_suffix('').parts)
       print(f"Adding {module_name} to descriptor pool")
-      proto_db.Add(desc)
+      blobs.append(getattr(importlib.import_module(module_name), "DESCRIPTOR").serialized_pb)
+    _save_pool_cache(key, blobs)
+
+  for serialized_desc in blobs:
+    proto_db.Add(FileDescriptorProto.FromString(serialized_desc))
+  _pool_built = True
+  return proto_pool
 
 def GetObservePayload(traits):
   req = v2_pb2.ObserveRequest(version=2, subscribe=True)
@@ -93,13 +168,15 @@ def SendGRPCRequest(session, url, access_token, payload, base_url):
 
     
 
-def ParseStreamBody(data):
+def ParseStreamBody(data, raw=False):
+  """Parse a StreamBody into a dict, or return the message itself if raw."""
   try:
     streambody = rpc.StreamBody()
     streambody.ParseFromString(data)
-    json_string = json_format.MessageToJson(streambody, descriptor_pool=proto_pool)
-    json_data = json.loads(json_string)
-    return json_data
+    if raw:
+      return streambody
+    # Same dict as MessageToJson + json.loads, without the text round trip
+    return json_format.MessageToDict(streambody, descriptor_pool=get_pool())
   except Exception as e:
     print(f"Error parsing stream body: {e}")
-    return {}
+    return None if raw else {}
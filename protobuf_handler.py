@@ -7,7 +7,15 @@ from proto.weave.trait import security_pb2 as weave_security_pb2
 from proto.nest.trait import user_pb2 as nest_user_pb2
 from proto.nest.trait import structure_pb2 as nest_structure_pb2
 from proto.nest import rpc_pb2 as rpc
-from protobuf_manager import read_protobuf_file
+from protobuf_manager import load_protobuf_cached
+
+# HomeKit trait decoders
+try:
+    from proto.weave.trait import description_pb2
+    from proto.weave.trait import power_pb2
+    PROTO_AVAILABLE = True
+except ImportError:
+    PROTO_AVAILABLE = False
 from const import (
     USER_AGENT_STRING,
     URL_PROTOBUF,
@@ -24,46 +32,252 @@ RETRY_DELAY_SECONDS = 10
 STREAM_TIMEOUT_SECONDS = 600  # 10min
 PING_INTERVAL_SECONDS = 60
 CATALOG_THRESHOLD = 20000  # 20KB
+OBSERVE_PAYLOAD_PATH = os.path.join(os.path.dirname(__file__), "proto", "ObserveTraits.bin")
+OBSERVE_URL = URL_PROTOBUF.format(grpc_hostname=PRODUCTION_HOSTNAME["grpc_hostname"]) + ENDPOINT_OBSERVE
+
+# Normalized form of every type URL seen so far; the set of trait URLs is small
+_NORMALIZED_TYPE_URLS = {}
 
 def _normalize_any_type(any_message: Any) -> Any:
-    """Map non-standard type URLs (e.g. type.nestlabs.com) to the canonical googleapis prefix."""
+    """Map non-standard type URLs (e.g. type.nestlabs.com) to the canonical googleapis prefix.
+
+    The type_url is rewritten in place rather than copying the payload into a new Any.
+    """
     if not isinstance(any_message, Any):
         return any_message
-    type_url = any_message.type_url or ""
-    if type_url.startswith("type.nestlabs.com/"):
-        normalized = Any()
-        normalized.value = any_message.value
-        normalized.type_url = type_url.replace("type.nestlabs.com/", "type.googleapis.com/", 1)
-        return normalized
+    type_url = any_message.type_url
+    normalized = _NORMALIZED_TYPE_URLS.get(type_url)
+    if normalized is None:
+        normalized = type_url
+        if type_url.startswith("type.nestlabs.com/"):
+            normalized = type_url.replace("type.nestlabs.com/", "type.googleapis.com/", 1)
+        _NORMALIZED_TYPE_URLS[type_url] = normalized
+    if normalized != type_url:
+        any_message.type_url = normalized
     return any_message
 
+def _read_varint(buffer, pos):
+    """Decode a varint at pos; returns (None, pos) if the buffer ends first."""
+    value = 0
+    shift = 0
+    end = len(buffer)
+    while pos < end and shift < 64:
+        byte = buffer[pos]
+        value |= (byte & 0x7F) << shift
+        pos += 1
+        shift += 7
+        if not (byte & 0x80):
+            return value, pos
+    return None, pos
+
+def _complete_frame_length(buffer):
+    """Length of the longest prefix of buffer made of whole top-level StreamBody fields.
+
+    Every StreamBody field is length-delimited, so concatenated fields are
+    themselves a valid StreamBody and a partial trailing field can wait for
+    the next chunk. Anything that is not length-delimited is returned whole.
+    """
+    pos = 0
+    end = len(buffer)
+    while pos < end:
+        tag, field_pos = _read_varint(buffer, pos)
+        if tag is None:
+            break
+        if tag & 0x7 != 2:
+            return end
+        length, field_pos = _read_varint(buffer, field_pos)
+        if length is None or field_pos + length > end:
+            break
+        pos = field_pos + length
+    return pos
+
+def _frame_iter(chunks):
+    """Regroup raw stream chunks into runs of whole top-level StreamBody fields.
+
+    Each yielded memoryview borrows the internal buffer and is only valid
+    until the next iteration.
+    """
+    buffer = bytearray()
+    for chunk in chunks:
+        if not chunk:
+            continue
+        buffer.extend(chunk)
+        frame_end = _complete_frame_length(buffer)
+        if not frame_end:
+            continue
+        with memoryview(buffer) as view, view[:frame_end] as frame:
+            yield frame
+        del buffer[:frame_end]
+
+def _seconds_or_none(value):
+    """Timestamp/Duration as float seconds, or None when its seconds are zero.
+
+    An unset message field reads as zero, so callers need no HasField() check.
+    """
+    return value.seconds + (value.nanos / 1e9) if value.seconds else None
+
+# Per-trait decoders: each takes the unpacked trait and returns its "data" dict
+def _decode_device_identity(trait, obj_id):
+    # Extract model with detailed logging
+    model_value = None
+    if trait.HasField("model_name"):
+        model_value = trait.model_name.value
+        if model_value:
+            _LOGGER.info(f"✅ Model found in DeviceIdentityTrait: '{model_value}'")
+        else:
+            _LOGGER.warning(f"⚠️  model_name field exists but value is empty")
+    else:
+        _LOGGER.warning(f"⚠️  model_name field not present in DeviceIdentityTrait")
+
+    # Extract manufacturer with detailed logging
+    manufacturer_value = None
+    if trait.HasField("manufacturer"):
+        manufacturer_value = trait.manufacturer.value
+        if manufacturer_value:
+            _LOGGER.debug("Manufacturer found: '%s'", manufacturer_value)
+
+    data = {
+        "serial_number": trait.serial_number if trait.serial_number else None,
+        "firmware_version": trait.fw_version if trait.fw_version else None,
+        "manufacturer": manufacturer_value,
+        "model": model_value,
+    }
+    _LOGGER.info(f"✅ Decoded DeviceIdentityTrait for {obj_id}: serial={data.get('serial_number')}, fw={data.get('firmware_version')}, model={data.get('model')}, manufacturer={data.get('manufacturer')}")
+    return data
+
+def _decode_battery_power_source(trait, obj_id):
+    data = {
+        "battery_level": trait.remaining.remainingPercent.value if trait.remaining.HasField("remainingPercent") else None,
+        "voltage": trait.assessedVoltage.value if trait.HasField("assessedVoltage") else None,
+        "condition": trait.condition,
+        "status": trait.status,
+        "replacement_indicator": trait.replacementIndicator,
+    }
+    _LOGGER.info(f"✅ Decoded BatteryPowerSourceTrait for {obj_id}: level={data.get('battery_level')}, voltage={data.get('voltage')}")
+    return data
+
+def _decode_bolt_lock(trait, obj_id):
+    # Extract boltLockActor details
+    actor_data = None
+    if trait.HasField("boltLockActor"):
+        actor = trait.boltLockActor
+        actor_data = {
+            "method": actor.method,
+            "originator": actor.originator.resourceId if actor.originator.resourceId else None,
+            "agent": actor.agent.resourceId if actor.agent.resourceId else None,
+        }
+
+    # Extract timestamp as seconds since epoch
+    locked_state_changed_at = _seconds_or_none(trait.lockedStateLastChangedAt)
+
+    data = {
+        "state": trait.state,
+        "actuator_state": trait.actuatorState,
+        "locked_state": trait.lockedState,
+        "bolt_lock_actor": actor_data,
+        "locked_state_last_changed_at": locked_state_changed_at,
+    }
+    _LOGGER.info(f"✅ Decoded BoltLockTrait for {obj_id}: state={trait.state}, locked_state={trait.lockedState}, actuator_state={trait.actuatorState}")
+    return data
+
+def _decode_bolt_lock_settings(trait, obj_id):
+    # Extract autoRelockDuration
+    auto_relock_duration_seconds = _seconds_or_none(trait.autoRelockDuration)
+
+    # For bool fields in proto3, check if field was set (HasField) or use default
+    # autoRelockOn defaults to False in proto3 if not set
+    auto_relock_on = None
+    if trait.HasField("autoRelockOn"):
+        auto_relock_on = trait.autoRelockOn
+
+    data = {
+        "auto_relock_on": auto_relock_on,
+        "auto_relock_duration_seconds": auto_relock_duration_seconds,
+    }
+
+    # Only log if we have at least one field
+    if auto_relock_on is not None or auto_relock_duration_seconds is not None:
+        _LOGGER.info(f"✅ Decoded BoltLockSettingsTrait for {obj_id}: auto_relock_on={auto_relock_on}, duration={auto_relock_duration_seconds}")
+    else:
+        _LOGGER.debug("✅ Decoded BoltLockSettingsTrait for %s but no fields present in message", obj_id)
+    return data
+
+def _decode_bolt_lock_capabilities(trait, obj_id):
+    # Extract maxAutoRelockDuration
+    max_auto_relock_duration_seconds = _seconds_or_none(trait.maxAutoRelockDuration)
+
+    data = {
+        "handedness": trait.handedness,
+        "max_auto_relock_duration_seconds": max_auto_relock_duration_seconds,
+    }
+    _LOGGER.info(f"✅ Decoded BoltLockCapabilitiesTrait for {obj_id}: handedness={trait.handedness}, max_duration={max_auto_relock_duration_seconds}")
+    return data
+
+def _decode_pincode_input(trait, obj_id):
+    data = {
+        "pincode_input_state": trait.pincodeInputState,
+    }
+    _LOGGER.debug("✅ Decoded PincodeInputTrait for %s: state=%s", obj_id, trait.pincodeInputState)
+    return data
+
+def _decode_tamper(trait, obj_id):
+    # Extract timestamps
+    first_observed_at = _seconds_or_none(trait.firstObservedAt)
+    first_observed_at_ms = _seconds_or_none(trait.firstObservedAtMs)
+
+    data = {
+        "tamper_state": trait.tamperState,
+        "first_observed_at": first_observed_at,
+        "first_observed_at_ms": first_observed_at_ms,
+    }
+    _LOGGER.debug("✅ Decoded TamperTrait for %s: tamper_state=%s", obj_id, trait.tamperState)
+    return data
+
+# Trait decoders keyed by full message name, i.e. the type_url after its last "/"
+_TRAIT_DECODERS = {
+    trait_cls.DESCRIPTOR.full_name: (trait_cls, decode)
+    for trait_cls, decode in (
+        (weave_security_pb2.BoltLockTrait, _decode_bolt_lock),
+        (weave_security_pb2.BoltLockSettingsTrait, _decode_bolt_lock_settings),
+        (weave_security_pb2.BoltLockCapabilitiesTrait, _decode_bolt_lock_capabilities),
+        (weave_security_pb2.PincodeInputTrait, _decode_pincode_input),
+        (weave_security_pb2.TamperTrait, _decode_tamper),
+    )
+}
+if PROTO_AVAILABLE:
+    _TRAIT_DECODERS.update(
+        (trait_cls.DESCRIPTOR.full_name, (trait_cls, decode))
+        for trait_cls, decode in (
+            (description_pb2.DeviceIdentityTrait, _decode_device_identity),
+            (power_pb2.BatteryPowerSourceTrait, _decode_battery_power_source),
+        )
+    )
+
+BOLT_LOCK_TRAIT = weave_security_pb2.BoltLockTrait.DESCRIPTOR.full_name
+STRUCTURE_INFO_TRAIT = nest_structure_pb2.StructureInfoTrait.DESCRIPTOR.full_name
+USER_INFO_TRAIT = nest_user_pb2.UserInfoTrait.DESCRIPTOR.full_name
+
 class NestProtobufHandler:
-    def __init__(self):
+    def __init__(self, decode_all_traits=True):
         self.buffer = bytearray()
         self.pending_length = None
+        # Last parsed StreamBody; subclasses read it after super()._process_message()
+        # instead of parsing the chunk a second time.
         self.stream_body = rpc.StreamBody()
+        # One reusable message per decodable trait; decoders copy plain values out
+        self._scratch = {trait_cls: trait_cls() for trait_cls, _ in _TRAIT_DECODERS.values()}
+        # Callers that only read "yale"/"user_id"/"structure_id" can skip building "all_traits"
+        self.decode_all_traits = decode_all_traits
 
     def _decode_varint(self, buffer, pos):
-        value = 0
-        shift = 0
-        start = pos
-        max_bytes = 10
-        while pos < len(buffer) and shift < 64:
-            byte = buffer[pos]
-            value |= (byte & 0x7F) << shift
-            pos += 1
-            shift += 7
-            if not (byte & 0x80):
-                _LOGGER.debug(f"Decoded varint: {value} from position {start} using {pos - start} bytes")
-                return value, pos
-            if pos - start >= max_bytes:
-                _LOGGER.error(f"Varint too long at pos {start}")
-                return None, pos
-        _LOGGER.error(f"Incomplete varint at pos {start}")
-        return None, pos
+        value, end = _read_varint(buffer, pos)
+        if value is None:
+            _LOGGER.error("Invalid or incomplete varint at pos %d", pos)
+        return value, end
 
     async def _process_message(self, message):
-        _LOGGER.debug(f"Raw chunk (length={len(message)}): {message.hex()}")
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Raw chunk (length=%d): %s", len(message), message.hex())
 
         if not message:
             _LOGGER.error("Empty protobuf message received.")
@@ -72,18 +286,10 @@ class NestProtobufHandler:
         locks_data = {"yale": {}, "user_id": None, "structure_id": None, "all_traits": {}}
         all_traits = {}
 
-        # Import HomeKit trait decoders
-        try:
-            from proto.weave.trait import description_pb2
-            from proto.weave.trait import power_pb2
-            PROTO_AVAILABLE = True
-        except ImportError:
-            PROTO_AVAILABLE = False
-
         try:
             self.stream_body.Clear()
             self.stream_body.ParseFromString(message)
-            _LOGGER.debug(f"Parsed StreamBody: {self.stream_body}")
+            _LOGGER.debug("Parsed StreamBody: %s", self.stream_body)
 
             for msg in self.stream_body.message:
                 for get_op in msg.get:
@@ -94,191 +300,48 @@ class NestProtobufHandler:
                     property_any = _normalize_any_type(property_any) if property_any else None
                     type_url = getattr(property_any, "type_url", None) if property_any else None
                     if not type_url and 7 in get_op:
-                        type_url = "weave.trait.security.BoltLockTrait"
+                        type_url = BOLT_LOCK_TRAIT
+                    trait_name = type_url.rpartition("/")[2] if type_url else ""
 
-                    _LOGGER.debug(f"Extracting `{type_url}` for `{obj_id}` with key `{obj_key}`")
+                    _LOGGER.debug("Extracting `%s` for `%s` with key `%s`", type_url, obj_id, obj_key)
+                    # Set when the BoltLockTrait below was already unpacked for all_traits
+                    bolt_lock = None
                     
                     # Extract ALL trait data
-                    if property_any and type_url:
+                    if self.decode_all_traits and property_any and type_url:
                         trait_key = f"{obj_id}:{type_url}"
                         trait_info = {"object_id": obj_id, "type_url": type_url, "decoded": False}
                         
                         try:
-                            # DeviceIdentityTrait
-                            if "DeviceIdentityTrait" in type_url and PROTO_AVAILABLE:
-                                trait = description_pb2.DeviceIdentityTrait()
-                                property_any.Unpack(trait)
-                                trait_info["decoded"] = True
-                                
-                                # Extract model with detailed logging
-                                model_value = None
-                                if trait.HasField("model_name"):
-                                    model_value = trait.model_name.value
-                                    if model_value:
-                                        _LOGGER.info(f"✅ Model found in DeviceIdentityTrait: '{model_value}'")
-                                    else:
-                                        _LOGGER.warning(f"⚠️  model_name field exists but value is empty")
-                                else:
-                                    _LOGGER.warning(f"⚠️  model_name field not present in DeviceIdentityTrait")
-                                
-                                # Extract manufacturer with detailed logging
-                                manufacturer_value = None
-                                if trait.HasField("manufacturer"):
-                                    manufacturer_value = trait.manufacturer.value
-                                    if manufacturer_value:
-                                        _LOGGER.debug(f"Manufacturer found: '{manufacturer_value}'")
-                                
-                                trait_info["data"] = {
-                                    "serial_number": trait.serial_number if trait.serial_number else None,
-                                    "firmware_version": trait.fw_version if trait.fw_version else None,
-                                    "manufacturer": manufacturer_value,
-                                    "model": model_value,
-                                }
-                                _LOGGER.info(f"✅ Decoded DeviceIdentityTrait for {obj_id}: serial={trait_info['data'].get('serial_number')}, fw={trait_info['data'].get('firmware_version')}, model={trait_info['data'].get('model')}, manufacturer={trait_info['data'].get('manufacturer')}")
-                            
-                            # BatteryPowerSourceTrait
-                            elif "BatteryPowerSourceTrait" in type_url and PROTO_AVAILABLE:
-                                trait = power_pb2.BatteryPowerSourceTrait()
-                                property_any.Unpack(trait)
-                                trait_info["decoded"] = True
-                                trait_info["data"] = {
-                                    "battery_level": trait.remaining.remainingPercent.value if trait.HasField("remaining") and trait.remaining.HasField("remainingPercent") else None,
-                                    "voltage": trait.assessedVoltage.value if trait.HasField("assessedVoltage") else None,
-                                    "condition": trait.condition,
-                                    "status": trait.status,
-                                    "replacement_indicator": trait.replacementIndicator,
-                                }
-                                _LOGGER.info(f"✅ Decoded BatteryPowerSourceTrait for {obj_id}: level={trait_info['data'].get('battery_level')}, voltage={trait_info['data'].get('voltage')}")
-                            
-                            # BoltLockTrait (main trait - extract ALL fields)
-                            elif "BoltLockTrait" in type_url and "BoltLockSettings" not in type_url and "BoltLockCapabilities" not in type_url and PROTO_AVAILABLE:
-                                trait = weave_security_pb2.BoltLockTrait()
-                                property_any.Unpack(trait)
-                                trait_info["decoded"] = True
-                                
-                                # Extract boltLockActor details
-                                actor_data = None
-                                if trait.HasField("boltLockActor"):
-                                    actor = trait.boltLockActor
-                                    actor_data = {
-                                        "method": actor.method,
-                                        "originator": actor.originator.resourceId if actor.HasField("originator") and actor.originator.resourceId else None,
-                                        "agent": actor.agent.resourceId if actor.HasField("agent") and actor.agent.resourceId else None,
-                                    }
-                                
-                                # Extract timestamp
-                                locked_state_changed_at = None
-                                if trait.HasField("lockedStateLastChangedAt"):
-                                    ts = trait.lockedStateLastChangedAt
-                                    # Convert to seconds since epoch
-                                    locked_state_changed_at = ts.seconds + (ts.nanos / 1e9) if ts.seconds else None
-                                
-                                trait_info["data"] = {
-                                    "state": trait.state,
-                                    "actuator_state": trait.actuatorState,
-                                    "locked_state": trait.lockedState,
-                                    "bolt_lock_actor": actor_data,
-                                    "locked_state_last_changed_at": locked_state_changed_at,
-                                }
-                                _LOGGER.info(f"✅ Decoded BoltLockTrait for {obj_id}: state={trait.state}, locked_state={trait.lockedState}, actuator_state={trait.actuatorState}")
-                            
-                            # BoltLockSettingsTrait
-                            elif "BoltLockSettingsTrait" in type_url and PROTO_AVAILABLE:
-                                trait = weave_security_pb2.BoltLockSettingsTrait()
-                                property_any.Unpack(trait)
-                                trait_info["decoded"] = True
-                                
-                                # Extract autoRelockDuration
-                                auto_relock_duration_seconds = None
-                                if trait.HasField("autoRelockDuration"):
-                                    duration = trait.autoRelockDuration
-                                    auto_relock_duration_seconds = duration.seconds + (duration.nanos / 1e9) if duration.seconds else None
-                                
-                                # For bool fields in proto3, check if field was set (HasField) or use default
-                                # autoRelockOn defaults to False in proto3 if not set
-                                auto_relock_on = None
-                                if trait.HasField("autoRelockOn"):
-                                    auto_relock_on = trait.autoRelockOn
-                                
-                                trait_info["data"] = {
-                                    "auto_relock_on": auto_relock_on,
-                                    "auto_relock_duration_seconds": auto_relock_duration_seconds,
-                                }
-                                
-                                # Only log if we have at least one field
-                                if auto_relock_on is not None or auto_relock_duration_seconds is not None:
-                                    _LOGGER.info(f"✅ Decoded BoltLockSettingsTrait for {obj_id}: auto_relock_on={auto_relock_on}, duration={auto_relock_duration_seconds}")
-                                else:
-                                    _LOGGER.debug(f"✅ Decoded BoltLockSettingsTrait for {obj_id} but no fields present in message")
-                            
-                            # BoltLockCapabilitiesTrait
-                            elif "BoltLockCapabilitiesTrait" in type_url and PROTO_AVAILABLE:
-                                trait = weave_security_pb2.BoltLockCapabilitiesTrait()
+                            decoder = _TRAIT_DECODERS.get(trait_name)
+                            if decoder is not None:
+                                trait_cls, decode = decoder
+                                # Unpack() parses from scratch, so the instance can be reused
+                                trait = self._scratch[trait_cls]
                                 property_any.Unpack(trait)
+                                if trait_cls is weave_security_pb2.BoltLockTrait:
+                                    bolt_lock = trait
                                 trait_info["decoded"] = True
-                                
-                                # Extract maxAutoRelockDuration
-                                max_auto_relock_duration_seconds = None
-                                if trait.HasField("maxAutoRelockDuration"):
-                                    duration = trait.maxAutoRelockDuration
-                                    max_auto_relock_duration_seconds = duration.seconds + (duration.nanos / 1e9) if duration.seconds else None
-                                
-                                trait_info["data"] = {
-                                    "handedness": trait.handedness,
-                                    "max_auto_relock_duration_seconds": max_auto_relock_duration_seconds,
-                                }
-                                _LOGGER.info(f"✅ Decoded BoltLockCapabilitiesTrait for {obj_id}: handedness={trait.handedness}, max_duration={max_auto_relock_duration_seconds}")
-                            
-                            # PincodeInputTrait
-                            elif "PincodeInputTrait" in type_url and PROTO_AVAILABLE:
-                                trait = weave_security_pb2.PincodeInputTrait()
-                                property_any.Unpack(trait)
-                                trait_info["decoded"] = True
-                                trait_info["data"] = {
-                                    "pincode_input_state": trait.pincodeInputState,
-                                }
-                                _LOGGER.debug(f"✅ Decoded PincodeInputTrait for {obj_id}: state={trait.pincodeInputState}")
-                            
-                            # TamperTrait
-                            elif "TamperTrait" in type_url and PROTO_AVAILABLE:
-                                trait = weave_security_pb2.TamperTrait()
-                                property_any.Unpack(trait)
-                                trait_info["decoded"] = True
-                                
-                                # Extract timestamps
-                                first_observed_at = None
-                                first_observed_at_ms = None
-                                if trait.HasField("firstObservedAt"):
-                                    ts = trait.firstObservedAt
-                                    first_observed_at = ts.seconds + (ts.nanos / 1e9) if ts.seconds else None
-                                if trait.HasField("firstObservedAtMs"):
-                                    ts = trait.firstObservedAtMs
-                                    first_observed_at_ms = ts.seconds + (ts.nanos / 1e9) if ts.seconds else None
-                                
-                                trait_info["data"] = {
-                                    "tamper_state": trait.tamperState,
-                                    "first_observed_at": first_observed_at,
-                                    "first_observed_at_ms": first_observed_at_ms,
-                                }
-                                _LOGGER.debug(f"✅ Decoded TamperTrait for {obj_id}: tamper_state={trait.tamperState}")
+                                trait_info["data"] = decode(trait, obj_id)
                         except Exception as e:
                             trait_info["error"] = str(e)
-                            _LOGGER.debug(f"Error decoding trait {type_url}: {e}")
+                            _LOGGER.debug("Error decoding trait %s: %s", type_url, e)
                         
                         all_traits[trait_key] = trait_info
 
                     # Existing lock-specific processing (keep for backward compatibility)
                     # Note: Full trait data is already stored in all_traits above
-                    if "BoltLockTrait" in (type_url or "") and "BoltLockSettings" not in type_url and "BoltLockCapabilities" not in type_url and obj_id:
-                        bolt_lock = weave_security_pb2.BoltLockTrait()
+                    if trait_name == BOLT_LOCK_TRAIT and obj_id:
                         try:
                             if not property_any:
                                 _LOGGER.warning(f"No property payload for {obj_id}, skipping BoltLockTrait decode")
                                 continue
-                            unpacked = property_any.Unpack(bolt_lock)
-                            if not unpacked:
-                                _LOGGER.warning(f"Unpacking failed for {obj_id}, skipping")
-                                continue
+                            if bolt_lock is None:
+                                bolt_lock = self._scratch[weave_security_pb2.BoltLockTrait]
+                                unpacked = property_any.Unpack(bolt_lock)
+                                if not unpacked:
+                                    _LOGGER.warning(f"Unpacking failed for {obj_id}, skipping")
+                                    continue
 
                             # Extract basic lock state for backward compatibility
                             locks_data["yale"][obj_id] = {
@@ -295,20 +358,18 @@ class NestProtobufHandler:
                             if bolt_lock.HasField("boltLockActor"):
                                 actor = bolt_lock.boltLockActor
                                 locks_data["yale"][obj_id]["actor_method"] = actor.method
-                                if actor.HasField("originator") and actor.originator.resourceId:
+                                if actor.originator.resourceId:
                                     locks_data["yale"][obj_id]["actor_originator"] = actor.originator.resourceId
                                     locks_data["user_id"] = actor.originator.resourceId
-                                if actor.HasField("agent") and actor.agent.resourceId:
+                                if actor.agent.resourceId:
                                     locks_data["yale"][obj_id]["actor_agent"] = actor.agent.resourceId
                             
                             # Extract timestamp
-                            if bolt_lock.HasField("lockedStateLastChangedAt"):
-                                ts = bolt_lock.lockedStateLastChangedAt
-                                locked_state_changed_at = ts.seconds + (ts.nanos / 1e9) if ts.seconds else None
-                                if locked_state_changed_at:
-                                    locks_data["yale"][obj_id]["locked_state_last_changed_at"] = locked_state_changed_at
+                            locked_state_changed_at = _seconds_or_none(bolt_lock.lockedStateLastChangedAt)
+                            if locked_state_changed_at:
+                                locks_data["yale"][obj_id]["locked_state_last_changed_at"] = locked_state_changed_at
                             
-                            _LOGGER.debug(f"Parsed BoltLockTrait for {obj_id}: {locks_data['yale'][obj_id]}, user_id={locks_data.get('user_id')}")
+                            _LOGGER.debug("Parsed BoltLockTrait for %s: %s, user_id=%s", obj_id, locks_data['yale'][obj_id], locks_data.get('user_id'))
 
                         except DecodeError as e:
                             _LOGGER.error(f"Failed to decode BoltLockTrait for {obj_id}: {e}")
@@ -317,10 +378,10 @@ class NestProtobufHandler:
                             _LOGGER.error(f"Unexpected error unpacking BoltLockTrait for {obj_id}: {e}")
                             continue
 
-                    elif "StructureInfoTrait" in type_url and obj_id:
+                    elif trait_name == STRUCTURE_INFO_TRAIT and obj_id:
                         try:
                             # Log raw structure_info for debugging
-                            _LOGGER.debug(f"Raw structure_info data for {obj_id}: {property_any}")
+                            _LOGGER.debug("Raw structure_info data for %s: %s", obj_id, property_any)
                             # Extract legacyId or use obj_id as fallback
                             if property_any:
                                 structure = nest_structure_pb2.StructureInfoTrait()
@@ -330,24 +391,25 @@ class NestProtobufHandler:
                                     continue
                                 if structure.legacy_id:
                                   locks_data["structure_id"] = structure.legacy_id.split('.')[1]
-                                _LOGGER.debug(f"StructureInfoTrait value: {structure}")
-                                _LOGGER.debug(f"Parsed structure_info for {obj_id}: structure_id={locks_data['structure_id']}")
+                                _LOGGER.debug("StructureInfoTrait value: %s", structure)
+                                _LOGGER.debug("Parsed structure_info for %s: structure_id=%s", obj_id, locks_data['structure_id'])
                         except Exception as e:
                             _LOGGER.error(f"Failed to parse structure_info for {obj_id}: {e}")
-                    elif "UserInfoTrait" in type_url:
+                    elif trait_name == USER_INFO_TRAIT:
                         try:
                             locks_data["user_id"] = obj_id
                         except Exception as e:
                             _LOGGER.error(f"Failed to parse UserInfoTrait: {e}")
 
             locks_data["all_traits"] = all_traits
-            _LOGGER.debug(f"Final lock data: {locks_data}")
+            _LOGGER.debug("Final lock data: %s", locks_data)
             if all_traits:
                 _LOGGER.info(f"Decoded {len([t for t in all_traits.values() if t.get('decoded')])} trait(s) successfully")
             return locks_data
 
         except DecodeError as e:
             _LOGGER.error(f"DecodeError in StreamBody: {e}")
+            self.stream_body.Clear()
             return locks_data
         except Exception as e:
             _LOGGER.error(f"Unexpected error processing message: {e}", exc_info=True)
@@ -371,15 +433,17 @@ class NestProtobufHandler:
                         if self.pending_length is None or offset >= len(data):
                             _LOGGER.warning(f"Invalid varint in chunk: {data.hex()[:200]}... skipping")
                             continue
-                        self.buffer.extend(data[offset:])
+                        # Skip the length prefix without copying the rest of the chunk first
+                        self.buffer.extend(memoryview(data)[offset:])
                     else:
                         self.buffer.extend(data)
 
-                    _LOGGER.debug(f"Buffer size: {len(self.buffer)} bytes, pending_length: {self.pending_length}")
+                    _LOGGER.debug("Buffer size: %s bytes, pending_length: %s", len(self.buffer), self.pending_length)
 
                     while self.pending_length and len(self.buffer) >= self.pending_length:
                         message = self.buffer[:self.pending_length]
-                        self.buffer = self.buffer[self.pending_length:]
+                        # Drop the consumed prefix in place instead of copying the tail
+                        del self.buffer[:self.pending_length]
                         locks_data = await self._process_message(message)
                         self.pending_length = None if len(self.buffer) < 5 else self._decode_varint(self.buffer, 0)[0]
 
@@ -389,7 +453,8 @@ class NestProtobufHandler:
 
                     if len(self.buffer) >= CATALOG_THRESHOLD and self.pending_length:
                         message = self.buffer[:self.pending_length]
-                        self.buffer = self.buffer[self.pending_length:]
+                        # Drop the consumed prefix in place instead of copying the tail
+                        del self.buffer[:self.pending_length]
                         locks_data = await self._process_message(message)
                         self.pending_length = None if len(self.buffer) < 5 else self._decode_varint(self.buffer, 0)[0]
 
@@ -418,8 +483,13 @@ class NestProtobufHandler:
             "Accept": "application/x-protobuf",
         }
 
-        api_url = f"{URL_PROTOBUF.format(grpc_hostname=PRODUCTION_HOSTNAME['grpc_hostname'])}{ENDPOINT_OBSERVE}"
-        observe_data = await read_protobuf_file(os.path.join(os.path.dirname(__file__), "proto", "ObserveTraits.bin"))
+        api_url = OBSERVE_URL
+        try:
+            # Constant payload; only the first refresh touches the disk, off the event loop
+            observe_data = await asyncio.to_thread(load_protobuf_cached, OBSERVE_PAYLOAD_PATH)
+        except OSError as e:
+            _LOGGER.error(f"Error reading protobuf file {OBSERVE_PAYLOAD_PATH}: {e}")
+            observe_data = None
 
         try:
             async with connection.session.post(api_url, headers=headers, data=observe_data) as response: